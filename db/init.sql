@@ -1,5 +1,7 @@
 -- Enable pgvector extension
 CREATE EXTENSION IF NOT EXISTS vector;
+-- Trigram matching (indexes text_search's ILIKE '%…%' predicates)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Separate database for Gitea (Gitea manages its own schema)
 -- Created via GITEA__database__NAME env var; Gitea auto-creates if user has rights.
@@ -23,6 +25,7 @@ CREATE TABLE IF NOT EXISTS rtac_configs (
     file_path       TEXT NOT NULL,            -- path inside repo
     commit_sha      TEXT NOT NULL,
     device_name     TEXT,
+    content_hash    TEXT,                     -- blake2b-128 of raw XML (re-index short-circuit)
     parsed_at       TIMESTAMPTZ DEFAULT NOW(),
     metadata        JSONB DEFAULT '{}',       -- flexible extra fields
     UNIQUE (repo, file_path, commit_sha)
@@ -43,6 +46,16 @@ CREATE TABLE IF NOT EXISTS points (
     created_at      TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Last RTAC XML content each file's SC profile was generated from
+-- (lets the push webhook skip regenerating unchanged files)
+CREATE TABLE IF NOT EXISTS sc_profile_hashes (
+    repo            TEXT NOT NULL,
+    file_path       TEXT NOT NULL,
+    content_hash    TEXT NOT NULL,            -- blake2b-128 of raw XML
+    profiled_at     TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (repo, file_path)
+);
+
 -- Embeddings for RAG search (1 embedding per logical chunk)
 CREATE TABLE IF NOT EXISTS embeddings (
     id              SERIAL PRIMARY KEY,
@@ -62,10 +75,19 @@ CREATE INDEX IF NOT EXISTS idx_embeddings_hnsw
 
 -- B-tree indexes for common lookups
 CREATE INDEX IF NOT EXISTS idx_rtac_configs_repo ON rtac_configs(repo);
+CREATE INDEX IF NOT EXISTS idx_rtac_configs_content_hash ON rtac_configs(repo, file_path, content_hash);
 CREATE INDEX IF NOT EXISTS idx_points_config ON points(config_id);
 CREATE INDEX IF NOT EXISTS idx_embeddings_config ON embeddings(config_id);
 CREATE INDEX IF NOT EXISTS idx_embeddings_type ON embeddings(chunk_type);
 
+-- Trigram GIN indexes for substring text search (ILIKE '%…%')
+CREATE INDEX IF NOT EXISTS idx_points_name_trgm ON points USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_points_description_trgm ON points USING gin (description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_points_source_tag_trgm ON points USING gin (source_tag gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_points_destination_tag_trgm ON points USING gin (destination_tag gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_rtac_configs_device_name_trgm ON rtac_configs USING gin (device_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_rtac_configs_file_path_trgm ON rtac_configs USING gin (file_path gin_trgm_ops);
+
 -- ─── Cross-profile device mappings ────────────────────────────────────────
 -- Links equipment across CIM profiles: EQ ↔ SC ↔ PE ↔ CN
 -- Populated by: manual entry, naming-convention matching, or AI inference.
@@ -93,7 +115,8 @@ CREATE TABLE IF NOT EXISTS device_mappings (
     config_id       INTEGER REFERENCES rtac_configs(id) ON DELETE SET NULL,
     created_at      TIMESTAMPTZ DEFAULT NOW(),
     updated_at      TIMESTAMPTZ DEFAULT NOW(),
-    UNIQUE (substation, eq_uri, sc_device_uri)
+    -- NULLS NOT DISTINCT: upserts must match rows with NULL eq_uri / sc_device_uri
+    CONSTRAINT uq_device_mapping UNIQUE NULLS NOT DISTINCT (substation, eq_uri, sc_device_uri)
 );
 
 CREATE INDEX IF NOT EXISTS idx_device_mappings_sub ON device_mappings(substation);
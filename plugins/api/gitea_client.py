@@ -2,91 +2,167 @@
 Gitea API helper — fetches and commits file content to Gitea repos.
 """
 
+import asyncio
 import base64
-import httpx
-from config import get_settings
+import io
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO
+
+from cachetools import LRUCache, TTLCache
+from api.http_clients import get_gitea_client
+
+# Identity used for commits the sidecar writes (the webhook skips these)
+BOT_NAME = "SCADA Studio Bot"
+BOT_EMAIL = "scada-bot@verance.ai"
+
+# Fetched files larger than this roll over from memory to a temp file
+_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# (repo, file_path, ref) → (etag, body) for conditional raw-file GETs,
+# bounded by total body bytes. Webhooks fetch at the pushed SHA, so this
+# mostly serves redeliveries of the same push; bodies over the per-entry
+# cap are not kept at all.
+_ETAG_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_ETAG_CACHE_MAX_BODY = 4 * 1024 * 1024
+_etag_cache: TTLCache = TTLCache(
+    maxsize=_ETAG_CACHE_MAX_BYTES, ttl=600, getsizeof=lambda entry: len(entry[1])
+)
+
+# Last known blob SHA per (repo, file_path, branch), refreshed from each write
+# response so updates can skip the pre-flight GET.
+_sha_cache: "LRUCache[tuple[str, str, str], str]" = LRUCache(maxsize=256)
 
 
 async def fetch_file_from_gitea(
     repo: str, file_path: str, ref: str = "main"
-) -> bytes:
+) -> BinaryIO:
     """
     Download raw file content from Gitea.
 
+    The body is streamed into a spooled temp file (in memory up to
+    ``_SPOOL_MAX_BYTES``, then on disk) and returned rewound; the caller
+    owns it and should close it when done. Repeat fetches send the cached
+    ETag as If-None-Match and are served from memory on a 304.
+
     Args:
         repo: "owner/repo" format
         file_path: path inside the repo
         ref: branch or commit SHA
     """
-    settings = get_settings()
-    url = f"{settings.gitea_url}/api/v1/repos/{repo}/raw/{file_path}?ref={ref}"
+    url = f"/api/v1/repos/{repo}/raw/{file_path}"
     headers = {}
-    if settings.gitea_token:
-        headers["Authorization"] = f"token {settings.gitea_token}"
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.get(url, headers=headers)
-        resp.raise_for_status()
-        return resp.content
+    key = (repo, file_path, ref)
+    cached = _etag_cache.get(key)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    spool = SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES)
+    try:
+        async with get_gitea_client().stream(
+            "GET", url, params={"ref": ref}, headers=headers
+        ) as resp:
+            if resp.status_code == 304 and cached:
+                spool.close()
+                return io.BytesIO(cached[1])
+            resp.raise_for_status()
+            etag = resp.headers.get("etag")
+            # Keep a copy for the ETag cache only while the body stays small
+            chunks: list[bytes] | None = [] if etag else None
+            size = 0
+            async for chunk in resp.aiter_bytes():
+                spool.write(chunk)
+                if chunks is not None:
+                    size += len(chunk)
+                    if size > _ETAG_CACHE_MAX_BODY:
+                        chunks = None
+                    else:
+                        chunks.append(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    if chunks is not None:
+        _etag_cache[key] = (etag, b"".join(chunks))
+    spool.seek(0)
+    return spool
 
 
 async def get_file_sha(repo: str, file_path: str, ref: str = "main") -> str | None:
     """Get the SHA of an existing file (needed for updates)."""
-    settings = get_settings()
-    url = f"{settings.gitea_url}/api/v1/repos/{repo}/contents/{file_path}?ref={ref}"
-    headers = {}
-    if settings.gitea_token:
-        headers["Authorization"] = f"token {settings.gitea_token}"
-
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.get(url, headers=headers)
-        if resp.status_code == 404:
-            return None
-        resp.raise_for_status()
-        return resp.json().get("sha")
+    url = f"/api/v1/repos/{repo}/contents/{file_path}"
+    resp = await get_gitea_client().get(url, params={"ref": ref})
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json().get("sha")
 
 
-async def commit_file_to_gitea(
+async def commit_files_to_gitea(
     repo: str,
-    file_path: str,
-    content: bytes,
+    files: list[tuple[str, bytes]],
     message: str,
     branch: str = "main",
 ) -> dict:
     """
-    Create or update a file in a Gitea repo via API.
+    Create or update several files in a single Gitea commit.
+
+    Uses Gitea's multi-file contents endpoint (``POST /contents``), so a
+    webhook that regenerates K files produces one commit — and one
+    follow-up bot webhook — instead of K. Existing-file SHAs come from the
+    cache when possible; on a 409/422 they are re-fetched and the POST is
+    retried once.
 
     Args:
         repo: "owner/repo" format
-        file_path: path inside the repo (e.g. "pointslist/V08_points.json")
-        content: file content as bytes
+        files: (path, content) pairs; paths must be unique
         message: commit message
         branch: target branch
     """
-    settings = get_settings()
-    url = f"{settings.gitea_url}/api/v1/repos/{repo}/contents/{file_path}"
-    headers = {
-        "Authorization": f"token {settings.gitea_token}",
-        "Content-Type": "application/json",
-    }
+    url = f"/api/v1/repos/{repo}/contents"
+    # base64 of multi-MB profiles is CPU-bound; keep it off the event loop
+    encoded = await asyncio.to_thread(
+        lambda: [(path, base64.b64encode(content).decode("ascii")) for path, content in files]
+    )
+
+    async def _build_changes(use_cache: bool) -> list[dict]:
+        async def _sha(path: str) -> str | None:
+            if use_cache and (sha := _sha_cache.get((repo, path, branch))):
+                return sha
+            return await get_file_sha(repo, path, ref=branch)
+
+        shas = await asyncio.gather(*(_sha(path) for path, _ in encoded))
+        changes = []
+        for (path, b64), sha in zip(encoded, shas):
+            change = {"operation": "update" if sha else "create", "path": path, "content": b64}
+            if sha:
+                change["sha"] = sha
+            changes.append(change)
+        return changes
 
     body = {
         "message": message,
-        "content": base64.b64encode(content).decode("ascii"),
         "branch": branch,
         "committer": {
-            "name": "SCADA Studio Bot",
-            "email": "scada-bot@verance.ai",
+            "name": BOT_NAME,
+            "email": BOT_EMAIL,
         },
+        "files": await _build_changes(use_cache=True),
     }
 
-    # Check if file already exists (need SHA for update)
-    existing_sha = await get_file_sha(repo, file_path, ref=branch)
-    if existing_sha:
-        body["sha"] = existing_sha
-
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.put(url, headers=headers, json=body)
-        resp.raise_for_status()
-        return resp.json()
+    client = get_gitea_client()
+    resp = await client.post(url, json=body)
+    if resp.status_code in (409, 422):
+        # A cached SHA was stale — rebuild from current SHAs and retry once
+        body["files"] = await _build_changes(use_cache=False)
+        resp = await client.post(url, json=body)
 
+    resp.raise_for_status()
+    data = resp.json()
+    for f in data.get("files") or []:
+        if f and f.get("path"):
+            key = (repo, f["path"], branch)
+            if sha := f.get("sha"):
+                _sha_cache[key] = sha
+            else:
+                _sha_cache.pop(key, None)
+    return data
@@ -0,0 +1,180 @@
+"""
+Shared outbound HTTP clients (Gitea + cim-admin).
+
+Clients are created lazily on first use and reused for the life of the
+process so webhook bursts get connection pooling and keep-alive instead
+of a fresh TCP/TLS handshake per request. ``close_http_clients()`` is
+called from the app lifespan on shutdown.
+"""
+
+import asyncio
+import logging
+import httpx
+from aiolimiter import AsyncLimiter
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+# Staged budgets so a stuck connect/pool wait fails fast instead of
+# consuming one 30s window
+_TIMEOUT = httpx.Timeout(15.0, connect=3.0, read=15.0, write=10.0, pool=5.0)
+
+# Token bucket for Gitea requests (per process)
+_GITEA_RATE = 20  # requests per second
+# Pause when the server reports ≤ this fraction of its rate limit remaining
+_RATE_LIMIT_LOW_WATER = 0.1
+_DEFAULT_RETRY_AFTER = 1.0
+
+# Adaptive cap on concurrent Gitea requests
+_GITEA_MAX_CONCURRENCY = 32
+_GITEA_INCREASE_AFTER = 10  # consecutive successes before the cap grows by 1
+
+_gitea_client: httpx.AsyncClient | None = None
+_cim_admin_client: httpx.AsyncClient | None = None
+
+
+class AIMDTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper with an additive-increase / multiplicative-decrease
+    concurrency limit.
+
+    A 429 or read timeout halves the number of requests allowed in flight;
+    every ``increase_after`` consecutive successes raise it by one, up to
+    ``max_limit``. The slot covers the request up to response headers.
+    """
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        max_limit: int,
+        increase_after: int,
+    ):
+        self._inner = inner
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self._increase_after = increase_after
+        self._successes = 0
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+
+    def _record(self, overloaded: bool) -> None:
+        if overloaded:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+            logger.warning(f"Gitea backpressure: concurrency limit → {self.limit}")
+        else:
+            self._successes += 1
+            if self._successes >= self._increase_after and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        try:
+            resp = await self._inner.handle_async_request(request)
+        except httpx.ReadTimeout:
+            self._record(overloaded=True)
+            raise
+        else:
+            self._record(overloaded=resp.status_code == 429)
+            return resp
+        finally:
+            async with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class RateLimitTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper that paces requests through a token bucket and backs
+    off when the server says it is close to (or over) its rate limit.
+
+    After each response, a 429 or an ``X-RateLimit-Remaining`` at or below
+    the low-water mark pauses *all* requests through this transport for
+    ``Retry-After`` seconds, instead of bursting into further 429s.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, limiter: AsyncLimiter):
+        self._inner = inner
+        self._limiter = limiter
+        self._resume_at = 0.0
+
+    def _backoff_seconds(self, resp: httpx.Response) -> float | None:
+        headers = resp.headers
+        low = resp.status_code == 429
+        remaining, limit = headers.get("x-ratelimit-remaining"), headers.get("x-ratelimit-limit")
+        if not low and remaining is not None and limit is not None:
+            try:
+                low = int(remaining) <= int(limit) * _RATE_LIMIT_LOW_WATER
+            except ValueError:
+                pass
+        if not low:
+            return None
+        try:
+            return float(headers.get("retry-after", _DEFAULT_RETRY_AFTER))
+        except ValueError:  # HTTP-date form
+            return _DEFAULT_RETRY_AFTER
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        if (delay := self._resume_at - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        async with self._limiter:
+            resp = await self._inner.handle_async_request(request)
+        if (pause := self._backoff_seconds(resp)) is not None:
+            self._resume_at = max(self._resume_at, loop.time() + pause)
+            logger.warning(f"Gitea rate limit low; pausing requests for {pause:.1f}s")
+        return resp
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def get_gitea_client() -> httpx.AsyncClient:
+    """Pooled, token-authenticated client for the Gitea API (base_url = settings.gitea_url)."""
+    global _gitea_client
+    if _gitea_client is None:
+        settings = get_settings()
+        transport = RateLimitTransport(
+            AIMDTransport(
+                httpx.AsyncHTTPTransport(limits=_LIMITS),
+                max_limit=_GITEA_MAX_CONCURRENCY,
+                increase_after=_GITEA_INCREASE_AFTER,
+            ),
+            AsyncLimiter(max_rate=_GITEA_RATE, time_period=1.0),
+        )
+        # Auth is a client default header, built once rather than per call
+        headers = {"Authorization": f"token {settings.gitea_token}"} if settings.gitea_token else None
+        _gitea_client = httpx.AsyncClient(
+            base_url=settings.gitea_url, headers=headers, transport=transport, timeout=_TIMEOUT
+        )
+        logger.info("Gitea HTTP client created")
+    return _gitea_client
+
+
+def get_cim_admin_client() -> httpx.AsyncClient:
+    """Pooled client for cim-admin (base_url = settings.cim_admin_url)."""
+    global _cim_admin_client
+    if _cim_admin_client is None:
+        settings = get_settings()
+        _cim_admin_client = httpx.AsyncClient(
+            base_url=settings.cim_admin_url, limits=_LIMITS, timeout=_TIMEOUT
+        )
+        logger.info("cim-admin HTTP client created")
+    return _cim_admin_client
+
+
+async def close_http_clients() -> None:
+    """Close any clients that were opened (called on app shutdown)."""
+    global _gitea_client, _cim_admin_client
+    for client in (_gitea_client, _cim_admin_client):
+        if client is not None:
+            await client.aclose()
+    _gitea_client = None
+    _cim_admin_client = None
@@ -2,12 +2,31 @@
 API routes — ties together all plugin modules.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+import asyncio
+import hashlib
+import io
+import logging
+import re
+from datetime import datetime, timezone
+from itertools import chain
+from operator import attrgetter
+from cachetools import LRUCache, TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Query
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 
 from database import get_db
-from rtac_plg.parser import parse_rtac_xml_bytes, extract_points
+from models import DeviceMapping, ScProfileHash
+from rtac_plg.parser import XmlSource, parse_rtac_xml, xml_digest
+from rtac_plg.points_list import generate
+from rtac_plg.sc_profile import generate_sc_profile_from_bytes, model_timestamp
+from rtac_plg.workers import run_xml_task
 from rag.indexer import index_config
 from rag.search import text_search
 from similar_configs.finder import find_similar
@@ -18,6 +37,7 @@ from api.schemas import (
     SimilarRequest,
     SimilarResponse,
     WebhookPayload,
+    CommitInfo,
     IndexResponse,
     DeviceMappingCreate,
     DeviceMappingResponse,
@@ -25,9 +45,22 @@ from api.schemas import (
     AutoDetectRequest,
     AutoDetectResponse,
 )
-from api.gitea_client import fetch_file_from_gitea, commit_file_to_gitea
+from api.gitea_client import BOT_EMAIL, fetch_file_from_gitea, commit_files_to_gitea
+from api.http_clients import get_cim_admin_client
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Max files processed concurrently per webhook delivery
+_WEBHOOK_CONCURRENCY = 16
+
+# (repo, file_path, content_hash) of XML already turned into an SC profile
+_profiled_hashes: "LRUCache[tuple[str, str, str], None]" = LRUCache(maxsize=1024)
+
+# (substation, profile digest) → model URN of the last successful
+# Blazegraph import; identical profiles are not re-uploaded
+_imported_profiles: "TTLCache[tuple[str, str], str]" = TTLCache(maxsize=256, ttl=3600)
 
 
 # ─── RTAC PLG ────────────────────────────────────────────────────────────
@@ -39,19 +72,22 @@ async def parse_rtac_config(
     db: AsyncSession = Depends(get_db),
 ):
     """Upload an RTAC XML export and extract points."""
-    content = await file.read()
     try:
-        devices, points = parse_rtac_xml_bytes(content, filename=file.filename or "upload.xml")
+        devices, points = await run_xml_task(
+            parse_rtac_xml, file.file, filename=file.filename or "upload.xml"
+        )
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Failed to parse XML: {e}")
 
-    return ParseResponse(
-        filename=file.filename or "upload.xml",
-        device_count=len(devices),
-        point_count=len(points),
-        devices=devices,
-        points=points,
-    )
+    # Points come straight from our parser; returning the response directly
+    # skips re-validating thousands of dicts against ParseResponse
+    return ORJSONResponse({
+        "filename": file.filename or "upload.xml",
+        "device_count": len(devices),
+        "point_count": len(points),
+        "devices": devices,
+        "points": points,
+    })
 
 
 @router.post("/parse/points-list", tags=["RTAC PLG"])
@@ -60,10 +96,9 @@ async def generate_points_list(
     format: str = Query("json", regex="^(json|csv)$"),
 ):
     """Upload RTAC XML → returns points list as JSON or CSV."""
-    from rtac_plg.points_list import generate
-
-    content = await file.read()
-    return generate(content, file.filename or "upload.xml", output_format=format)
+    return await run_in_threadpool(
+        generate, file.file, file.filename or "upload.xml", output_format=format
+    )
 
 
 # ─── CIM Profile Generation ─────────────────────────────────────────────
@@ -85,13 +120,10 @@ async def generate_sc_profile_endpoint(
     - cim:RemoteSource / cim:RemoteControl linking points to RTUs
     - ver:SCADAPoint extensions for DNP3 addresses and tag names
     """
-    from rtac_plg.sc_profile import generate_sc_profile_from_bytes
-    from fastapi.responses import Response
-
-    content = await file.read()
     try:
-        xml_bytes, stats = generate_sc_profile_from_bytes(
-            content,
+        xml_bytes, stats = await run_xml_task(
+            generate_sc_profile_from_bytes,
+            file.file,
             filename=file.filename or "upload.xml",
             substation_name=substation_name,
             eq_model_urn=eq_model_urn,
@@ -105,7 +137,8 @@ async def generate_sc_profile_endpoint(
             "profile": "SC",
             "model_urn": stats["model_urn"],
             "stats": stats,
-            "xml_preview": xml_bytes.decode("utf-8")[:2000],
+            # 2000 chars fit in 8000 UTF-8 bytes; don't decode the whole profile
+            "xml_preview": xml_bytes[:8000].decode("utf-8", errors="ignore")[:2000],
             "xml_size_bytes": len(xml_bytes),
         }
 
@@ -142,9 +175,8 @@ async def index_file(
     db: AsyncSession = Depends(get_db),
 ):
     """Parse an RTAC XML file and store embeddings for RAG search."""
-    content = await file.read()
     config_id = await index_config(
-        db, content, repo=repo, file_path=file_path,
+        db, file.file, repo=repo, file_path=file_path,
         commit_sha=commit_sha, filename=file.filename or "upload.xml",
     )
     return IndexResponse(config_id=config_id, status="indexed")
@@ -165,10 +197,55 @@ async def similar_configs(
 
 # ─── Gitea Webhook ───────────────────────────────────────────────────────
 
+_webhook_adapter = TypeAdapter(WebhookPayload)
 
-@router.post("/webhook/push", tags=["Webhooks"])
+
+def _inline_schema(adapter: TypeAdapter) -> dict:
+    """
+    ``adapter``'s JSON schema with nested models inlined, for openapi_extra
+    (its ``$defs`` refs would not resolve inside the OpenAPI document).
+    """
+    schema = adapter.json_schema()
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            if (ref := node.get("$ref")) is not None:
+                return resolve(defs[ref.rsplit("/", 1)[-1]])
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
+
+_BOT_EMAILS = frozenset({BOT_EMAIL})
+_BOT_RE = re.compile(r"SCADA Studio Bot|\[bot\]")
+_is_xml_path = re.compile(r"xml/.+\.xml").fullmatch
+
+
+def _is_bot_commit(commit: CommitInfo) -> bool:
+    """True for commits written by the sidecar itself (by email, then message)."""
+    for user in (commit.committer, commit.author):
+        if user is not None and user.email in _BOT_EMAILS:
+            return True
+    return _BOT_RE.search(commit.message) is not None
+
+
+@router.post(
+    "/webhook/push",
+    tags=["Webhooks"],
+    # The body is read by hand (below), so declare it for the OpenAPI schema
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _inline_schema(_webhook_adapter)}},
+        }
+    },
+)
 async def gitea_push_webhook(
-    payload: WebhookPayload,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -177,60 +254,169 @@ async def gitea_push_webhook(
     For each RTAC XML file in the commit:
       1. Index for RAG search (text + embeddings)
       2. Generate SC (SCADA Configuration) CIM profile
-      3. Commit the SC profile back to the Gitea repo under profiles/
-      4. Forward the SC profile to Blazegraph via cim-admin
+    Then, concurrently:
+      3. Forward each substation's SC profile to Blazegraph via cim-admin
+      4. Commit all regenerated SC profiles back to the Gitea repo under
+         profiles/ in a single commit
+    When several files map to one substation, the last one processed wins;
+    the same bytes go to Gitea and Blazegraph, once per substation.
 
     Skips commits made by the bot itself (prevents infinite loops).
-    """
-    import logging
 
-    logger = logging.getLogger(__name__)
+    The body is validated straight from JSON bytes as a WebhookPayload;
+    Gitea sends far more fields than we read, and they're skipped
+    without being materialized.
+    """
+    try:
+        payload = _webhook_adapter.validate_json(await request.body())
+    except ValidationError as e:
+        # Same error locations as a declared body parameter: ("body", ...)
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors()]
+        )
 
     repo = payload.repository.full_name
     commit_sha = payload.after
 
     # Derive substation name from repo (e.g. "scada/trinity-hills" → "trinity-hills")
     substation_name = repo.split("/")[-1] if "/" in repo else repo
+    # One FullModel timestamp for every profile regenerated by this push
+    profile_timestamp = model_timestamp()
 
     indexed = []
     profiles_generated = []
-
+    # substation → (summary, SC profile bytes, profile digest) of the
+    # profile that wins
+    latest_profiles: dict[str, tuple[dict, bytes, str]] = {}
+    # substation → (repo, file_path, content_hash) of the files it was built from
+    profiled_keys: dict[str, list[tuple[str, str, str]]] = {}
+
+    # Insertion-ordered set: a file touched by several commits (or listed as
+    # both added and modified) is processed once, at the pushed ref
+    xml_files: dict[str, None] = {}
     for commit in payload.commits:
         # Skip bot commits to prevent infinite webhook loops
-        if "SCADA Studio Bot" in commit.message or "[bot]" in commit.message:
+        if _is_bot_commit(commit):
             logger.info(f"Skipping bot commit: {commit.message[:60]}")
             continue
 
-        xml_files = [
-            f for f in commit.added + commit.modified
-            if f.startswith("xml/") and f.endswith(".xml")
-        ]
+        xml_files.update(
+            dict.fromkeys(filter(_is_xml_path, chain(commit.added, commit.modified)))
+        )
 
-        for fpath in xml_files:
-            try:
-                content = await fetch_file_from_gitea(repo, fpath, commit_sha)
+    # Bot-only pushes (our own profile commits) and pushes without XML
+    # changes return before any fetch/DB/task setup
+    if not xml_files:
+        return {"repo": repo, "commit": commit_sha, "indexed": [], "profiles_generated": []}
+
+    # Files are processed concurrently (bounded); the DB session is not safe
+    # for concurrent use, so session I/O (not parsing) is serialized behind a lock.
+    sem = asyncio.Semaphore(_WEBHOOK_CONCURRENCY)
+    db_lock = asyncio.Lock()
+
+    async def _process_one(fpath: str):
+        async with sem:
+            content = await fetch_file_from_gitea(repo, fpath, commit_sha)
+            with content:
+                digest = xml_digest(content)
 
-                # 1. Index for RAG search
+                # 1. Index for RAG search (parsed outside the lock)
                 config_id = await index_config(
                     db, content, repo=repo, file_path=fpath,
                     commit_sha=commit_sha, filename=fpath,
+                    content_hash=digest, db_lock=db_lock,
                 )
-                indexed.append({"file": fpath, "config_id": config_id})
 
-                # 2. Generate SC profile from RTAC XML
-                sc_result = await _generate_and_store_sc_profile(
-                    repo=repo,
+                # 2. Generate SC profile from RTAC XML (skipped if this exact
+                #    content was already profiled, e.g. on webhook retries)
+                async with db_lock:
+                    unchanged = await _already_profiled(db, (repo, fpath, digest))
+                if unchanged:
+                    logger.info(f"SC profile unchanged for {fpath}; skipping")
+                    return config_id, digest, None
+                content.seek(0)
+                sc_result = await _generate_sc_profile(
                     xml_content=content,
                     filename=fpath,
                     substation_name=substation_name,
                     logger=logger,
+                    timestamp=profile_timestamp,
                 )
-                if sc_result:
-                    profiles_generated.append(sc_result)
+            return config_id, digest, sc_result
 
+    results = await asyncio.gather(
+        *(_process_one(f) for f in xml_files), return_exceptions=True
+    )
+    for fpath, res in zip(xml_files, results):
+        if isinstance(res, Exception):
+            logger.warning(f"Failed to process {fpath}: {res}")
+            indexed.append({"file": fpath, "error": str(res)})
+            continue
+        config_id, digest, sc_result = res
+        indexed.append({"file": fpath, "config_id": config_id})
+        if sc_result:
+            summary, sc_xml_bytes = sc_result
+            profiles_generated.append(summary)
+            profiled_keys.setdefault(summary["substation"], []).append((repo, fpath, digest))
+            # Stable path per substation, so the last file processed wins
+            latest_profiles[summary["substation"]] = (
+                summary, sc_xml_bytes, _profile_digest(summary["substation"], fpath, digest)
+            )
+
+    profile_files = {
+        _sc_profile_path(sub): sc_xml_bytes
+        for sub, (_, sc_xml_bytes, _) in latest_profiles.items()
+    }
+
+    # 3. Commit all regenerated SC profiles back to Gitea in one commit
+    async def _commit_profiles() -> bool:
+        if not profile_files:
+            return False
+        sources = ", ".join(p["source_file"].split("/")[-1] for p in profiles_generated)
+        try:
+            commit_result = await commit_files_to_gitea(
+                repo=repo,
+                files=list(profile_files.items()),
+                message=f"[bot] Update SC profile from {sources}",
+            )
+            gitea_commit = (commit_result.get("commit") or {}).get("sha", "")
+            for p in profiles_generated:
+                p["gitea_path"] = _sc_profile_path(substation_name)
+                p["gitea_commit"] = gitea_commit
+            logger.info(f"SC profiles committed to {repo}: {', '.join(profile_files)}")
+        except Exception as e:
+            logger.warning(f"Failed to commit SC profiles to Gitea: {e}")
+            for p in profiles_generated:
+                p["gitea_error"] = str(e)
+            return False
+        return True
+
+    # Blazegraph imports don't depend on the Gitea commit (or vice versa)
+    committed, *_ = await asyncio.gather(
+        _commit_profiles(),
+        *(
+            _import_sc_profile_to_blazegraph(
+                summary, sc_xml_bytes, profile_digest, logger=logger
+            )
+            for summary, sc_xml_bytes, profile_digest in latest_profiles.values()
+        ),
+        return_exceptions=True,
+    )
+
+    # Content hashes are recorded only for substations whose profile reached
+    # both Gitea and Blazegraph, so a redelivery retries whichever half failed
+    if committed is True:
+        recorded = [
+            key
+            for sub, (summary, _, _) in latest_profiles.items()
+            if summary.get("blazegraph_imported")
+            for key in profiled_keys[sub]
+        ]
+        if recorded:
+            try:
+                await _record_profiled(db, recorded)
             except Exception as e:
-                logger.warning(f"Failed to process {fpath}: {e}")
-                indexed.append({"file": fpath, "error": str(e)})
+                logger.warning(f"Failed to record SC profile hashes: {e}")
 
     return {
         "repo": repo,
@@ -240,30 +426,79 @@ async def gitea_push_webhook(
     }
 
 
-async def _generate_and_store_sc_profile(
-    repo: str,
-    xml_content: bytes,
+async def _already_profiled(db: AsyncSession, key: tuple[str, str, str]) -> bool:
+    """True if (repo, file_path)'s last SC profile came from this content hash."""
+    if key in _profiled_hashes:
+        return True
+    repo, file_path, content_hash = key
+    last = await db.scalar(
+        select(ScProfileHash.content_hash).where(
+            ScProfileHash.repo == repo, ScProfileHash.file_path == file_path
+        )
+    )
+    if last != content_hash:
+        return False
+    _profiled_hashes[key] = None
+    return True
+
+
+async def _record_profiled(db: AsyncSession, keys: list[tuple[str, str, str]]) -> None:
+    """Persist the content hashes profiles were just committed and imported from."""
+    for key in keys:
+        _profiled_hashes[key] = None
+    rows = {(repo, path): h for repo, path, h in keys}  # last wins per file
+    stmt = pg_insert(ScProfileHash).values([
+        {"repo": repo, "file_path": path, "content_hash": h}
+        for (repo, path), h in rows.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["repo", "file_path"],
+        set_={"content_hash": stmt.excluded.content_hash,
+              "profiled_at": datetime.now(timezone.utc)},
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+def _profile_digest(substation_name: str, source_file: str, content_hash: str) -> str:
+    """
+    Digest identifying an SC profile's content across pushes.
+
+    The serialized profile carries the push's FullModel timestamp, so it is
+    never byte-identical twice; everything else in it is derived from the
+    source XML, its path and the substation name.
+    """
+    return hashlib.sha256(
+        f"{substation_name}\0{source_file}\0{content_hash}".encode()
+    ).hexdigest()
+
+
+def _sc_profile_path(substation_name: str) -> str:
+    """Stable repo path for a substation's SC profile ("current" state)."""
+    return f"profiles/{substation_name}_SC.xml"
+
+
+async def _generate_sc_profile(
+    xml_content: XmlSource,
     filename: str,
     substation_name: str,
     logger,
-) -> dict | None:
+    timestamp: str | None = None,
+) -> tuple[dict, bytes] | None:
     """
-    Generate an SC CIM profile from RTAC XML, commit it to Gitea,
-    and forward it to Blazegraph via cim-admin.
+    Generate an SC CIM profile from RTAC XML.
 
-    Returns a summary dict on success, None on failure.
+    Returns (summary dict, SC profile bytes) on success, None on failure.
+    Committing to Gitea and importing into Blazegraph are left to the
+    caller so they can run concurrently (and, for Gitea, in one commit).
     """
-    from rtac_plg.sc_profile import generate_sc_profile_from_bytes
-    from config import get_settings
-    import httpx
-
-    settings = get_settings()
-
     try:
-        sc_xml_bytes, stats = generate_sc_profile_from_bytes(
+        sc_xml_bytes, stats = await run_xml_task(
+            generate_sc_profile_from_bytes,
             xml_content,
             filename=filename,
             substation_name=substation_name,
+            timestamp=timestamp,
         )
     except Exception as e:
         logger.warning(f"SC profile generation failed for {filename}: {e}")
@@ -275,57 +510,94 @@ async def _generate_and_store_sc_profile(
         "model_urn": stats.get("model_urn", ""),
         "stats": stats,
     }
+    return result, sc_xml_bytes
 
-    # ── Commit SC profile back to Gitea ──
-    # Use a stable filename so it always reflects "current" state
-    sc_filename = f"profiles/{substation_name}_SC.xml"
-    try:
-        commit_result = await commit_file_to_gitea(
-            repo=repo,
-            file_path=sc_filename,
-            content=sc_xml_bytes,
-            message=f"[bot] Update SC profile from {filename.split('/')[-1]}",
-        )
-        result["gitea_path"] = sc_filename
-        result["gitea_commit"] = commit_result.get("content", {}).get("sha", "")
-        logger.info(f"SC profile committed to {repo}/{sc_filename}")
-    except Exception as e:
-        logger.warning(f"Failed to commit SC profile to Gitea: {e}")
-        result["gitea_error"] = str(e)
 
-    # ── Forward SC profile to Blazegraph via cim-admin ──
-    import_url = f"{settings.cim_admin_url}/api/profiles/import"
+async def _import_sc_profile_to_blazegraph(
+    result: dict,
+    sc_xml_bytes: bytes,
+    digest: str,
+    logger,
+) -> None:
+    """
+    Forward an SC profile to Blazegraph via cim-admin (best-effort).
+
+    Outcome is recorded on ``result`` (blazegraph_* keys). ``digest``
+    (see ``_profile_digest``) identifies the profile's content; a profile
+    with the same digest as the last one imported for the substation is
+    skipped, and the digest is sent as ``X-Content-Digest`` so cim-admin
+    can dedupe.
+    """
+    substation_name = result["substation"]
+    key = (substation_name, digest)
+    if (model_urn := _imported_profiles.get(key)) is not None:
+        result["blazegraph_imported"] = True
+        result["blazegraph_model_urn"] = model_urn
+        result["blazegraph_unchanged"] = True
+        logger.info(f"SC profile for {substation_name} unchanged; skipping Blazegraph import")
+        return
 
+    # ── Forward SC profile to Blazegraph via cim-admin ──
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post(
-                import_url,
+        # A file-like body is streamed by httpx in chunks; BytesIO over
+        # existing bytes shares the buffer rather than copying it.
+        with io.BytesIO(sc_xml_bytes) as sc_file:
+            resp = await get_cim_admin_client().post(
+                "/api/profiles/import",
                 params={
                     "profile_type": "SC",
                     "substation_name": substation_name,
                 },
+                headers={"X-Content-Digest": f"sha256={digest}"},
                 files={
-                    "file": (f"{substation_name}_SC.xml", sc_xml_bytes, "application/rdf+xml"),
+                    "file": (f"{substation_name}_SC.xml", sc_file, "application/rdf+xml"),
                 },
             )
-            if resp.status_code in (200, 201):
-                data = resp.json()
-                result["blazegraph_imported"] = data.get("success", False)
-                result["blazegraph_model_urn"] = data.get("model_urn", "")
-                logger.info(f"SC profile imported to Blazegraph for {substation_name}")
-            else:
-                logger.warning(f"Blazegraph import returned {resp.status_code}: {resp.text[:200]}")
-                result["blazegraph_error"] = f"HTTP {resp.status_code}"
+        if resp.status_code in (200, 201):
+            data = resp.json()
+            result["blazegraph_imported"] = data.get("success", False)
+            result["blazegraph_model_urn"] = data.get("model_urn", "")
+            if result["blazegraph_imported"]:
+                _imported_profiles[key] = result["blazegraph_model_urn"]
+            logger.info(f"SC profile imported to Blazegraph for {substation_name}")
+        else:
+            logger.warning(f"Blazegraph import returned {resp.status_code}: {resp.text[:200]}")
+            result["blazegraph_error"] = f"HTTP {resp.status_code}"
     except Exception as e:
         # Blazegraph push is best-effort; don't fail the webhook
         logger.warning(f"Failed to forward SC profile to Blazegraph: {e}")
         result["blazegraph_error"] = str(e)
 
-    return result
-
 
 # ─── Device Mappings (cross-profile) ─────────────────────────────────────
 
+# Upsert key — matches the uq_device_mapping constraint (NULLS NOT DISTINCT)
+_MAPPING_KEY = ("substation", "eq_uri", "sc_device_uri")
+
+# Outbound mapping rows are built straight from ORM attributes (no per-row
+# pydantic validation); field order matches DeviceMappingResponse.
+_MAPPING_FIELDS = tuple(DeviceMappingResponse.model_fields)
+_get_mapping_fields = attrgetter(*_MAPPING_FIELDS)
+
+# export key → DeviceMapping attribute
+_EXPORT_FIELDS = (
+    ("eq_name", "eq_name"),
+    ("eq_type", "eq_type"),
+    ("eq_uri", "eq_uri"),
+    ("sc_device", "sc_device_name"),
+    ("sc_map_name", "sc_map_name"),
+    ("pe_relay", "pe_relay_name"),
+    ("tag_pattern", "tag_pattern"),
+    ("confidence", "confidence"),
+    ("source", "source"),
+)
+_EXPORT_KEYS = tuple(k for k, _ in _EXPORT_FIELDS)
+_get_export_fields = attrgetter(*(a for _, a in _EXPORT_FIELDS))
+
+
+def _mapping_rows(rows) -> list[dict]:
+    return [dict(zip(_MAPPING_FIELDS, _get_mapping_fields(r))) for r in rows]
+
 
 @router.get("/mappings", response_model=DeviceMappingListResponse, tags=["Device Mappings"])
 async def list_mappings(
@@ -334,9 +606,6 @@ async def list_mappings(
     db: AsyncSession = Depends(get_db),
 ):
     """List device mappings, optionally filtered by substation or model."""
-    from sqlalchemy import select
-    from models import DeviceMapping
-
     stmt = select(DeviceMapping)
     if substation:
         stmt = stmt.where(DeviceMapping.substation == substation)
@@ -346,11 +615,11 @@ async def list_mappings(
 
     result = await db.execute(stmt)
     rows = result.scalars().all()
-    return DeviceMappingListResponse(
-        substation=substation,
-        count=len(rows),
-        mappings=[DeviceMappingResponse.model_validate(r) for r in rows],
-    )
+    return ORJSONResponse({
+        "substation": substation,
+        "count": len(rows),
+        "mappings": _mapping_rows(rows),
+    })
 
 
 @router.post("/mappings", response_model=DeviceMappingResponse, tags=["Device Mappings"])
@@ -359,28 +628,21 @@ async def create_mapping(
     db: AsyncSession = Depends(get_db),
 ):
     """Create or update a device mapping (upsert on substation+eq_uri+sc_device_uri)."""
-    from sqlalchemy import select
-    from models import DeviceMapping
-
-    # Check for existing mapping to upsert
-    stmt = select(DeviceMapping).where(
-        DeviceMapping.substation == body.substation,
-        DeviceMapping.eq_uri == body.eq_uri,
-        DeviceMapping.sc_device_uri == body.sc_device_uri,
-    )
-    result = await db.execute(stmt)
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        for field, value in body.model_dump(exclude_unset=True).items():
-            setattr(existing, field, value)
-        mapping = existing
-    else:
-        mapping = DeviceMapping(**body.model_dump())
-        db.add(mapping)
+    # Single INSERT … ON CONFLICT DO UPDATE … RETURNING; only fields the
+    # client actually sent overwrite an existing row.
+    stmt = pg_insert(DeviceMapping).values(**body.model_dump())
+    update_cols = {
+        k: stmt.excluded[k]
+        for k in body.model_dump(exclude_unset=True)
+        if k not in _MAPPING_KEY
+    }
+    update_cols["updated_at"] = datetime.now(timezone.utc)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(_MAPPING_KEY), set_=update_cols
+    ).returning(DeviceMapping)
 
+    mapping = (await db.scalars(stmt)).one()
     await db.commit()
-    await db.refresh(mapping)
     return DeviceMappingResponse.model_validate(mapping)
 
 
@@ -389,23 +651,59 @@ async def bulk_create_mappings(
     mappings: list[DeviceMappingCreate],
     db: AsyncSession = Depends(get_db),
 ):
-    """Bulk create/update device mappings."""
-    from models import DeviceMapping
+    """
+    Bulk create/update device mappings (upsert on substation+eq_uri+sc_device_uri).
 
+    As in ``create_mapping``, only fields an item actually sent overwrite an
+    existing row.
+    """
     results = []
-    for body in mappings:
-        mapping = DeviceMapping(**body.model_dump())
-        db.add(mapping)
-        results.append(mapping)
-
-    await db.commit()
-    for m in results:
-        await db.refresh(m)
-
-    return DeviceMappingListResponse(
-        count=len(results),
-        mappings=[DeviceMappingResponse.model_validate(m) for m in results],
-    )
+    if mappings:
+        # ON CONFLICT can't update one row twice in a statement, so a key
+        # repeated in the request is merged into one row, as sequential
+        # upserts would leave it (later items win on fields both sent)
+        rows: dict[tuple, tuple[dict, frozenset[str]]] = {}
+        keys = []
+        for body in mappings:
+            values = body.model_dump()
+            sent = body.model_fields_set
+            key = tuple(values[k] for k in _MAPPING_KEY)
+            if (prev := rows.get(key)) is not None:
+                prev_values, prev_sent = prev
+                values.update({k: prev_values[k] for k in prev_sent - sent})
+                sent = sent | prev_sent
+            rows[key] = (values, frozenset(sent))
+            keys.append(key)
+
+        # The SET clause depends on which fields were sent, so rows are
+        # grouped by that; usually one INSERT … ON CONFLICT DO UPDATE …
+        # RETURNING covers the whole request
+        groups: dict[frozenset[str], list[tuple]] = {}
+        for key, (_, sent) in rows.items():
+            groups.setdefault(sent, []).append(key)
+        now = datetime.now(timezone.utc)
+        by_key = {}
+        for sent, group in groups.items():
+            stmt = pg_insert(DeviceMapping)
+            update_cols = {
+                k: stmt.excluded[k]
+                for k in DeviceMappingCreate.model_fields
+                if k in sent and k not in _MAPPING_KEY
+            }
+            update_cols["updated_at"] = now
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(_MAPPING_KEY), set_=update_cols
+            ).returning(DeviceMapping, sort_by_parameter_order=True)
+            upserted = await db.scalars(stmt, [rows[key][0] for key in group])
+            by_key.update(zip(group, upserted.all()))
+        await db.commit()
+        results = [by_key[key] for key in keys]
+
+    return ORJSONResponse({
+        "substation": None,
+        "count": len(results),
+        "mappings": _mapping_rows(results),
+    })
 
 
 @router.delete("/mappings/{mapping_id}", tags=["Device Mappings"])
@@ -414,9 +712,6 @@ async def delete_mapping(
     db: AsyncSession = Depends(get_db),
 ):
     """Delete a device mapping by ID."""
-    from sqlalchemy import select
-    from models import DeviceMapping
-
     stmt = select(DeviceMapping).where(DeviceMapping.id == mapping_id)
     result = await db.execute(stmt)
     mapping = result.scalar_one_or_none()
@@ -434,10 +729,6 @@ async def export_mappings(
     db: AsyncSession = Depends(get_db),
 ):
     """Export all mappings for a substation as JSON (for git storage)."""
-    from sqlalchemy import select
-    from models import DeviceMapping
-    from datetime import datetime, timezone
-
     stmt = (
         select(DeviceMapping)
         .where(DeviceMapping.substation == substation)
@@ -446,22 +737,9 @@ async def export_mappings(
     result = await db.execute(stmt)
     rows = result.scalars().all()
 
-    return {
+    return ORJSONResponse({
         "substation": substation,
         "model": rows[0].model_name if rows else None,
-        "mappings": [
-            {
-                "eq_name": r.eq_name,
-                "eq_type": r.eq_type,
-                "eq_uri": r.eq_uri,
-                "sc_device": r.sc_device_name,
-                "sc_map_name": r.sc_map_name,
-                "pe_relay": r.pe_relay_name,
-                "tag_pattern": r.tag_pattern,
-                "confidence": r.confidence,
-                "source": r.source,
-            }
-            for r in rows
-        ],
+        "mappings": [dict(zip(_EXPORT_KEYS, _get_export_fields(r))) for r in rows],
         "exported_at": datetime.now(timezone.utc).isoformat(),
-    }
+    })
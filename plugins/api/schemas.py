@@ -3,7 +3,7 @@ Pydantic schemas for API request/response bodies.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Optional
 
 
 # ─── RTAC PLG ────────────────────────────────────────────────────────────
@@ -13,8 +13,8 @@ class ParseResponse(BaseModel):
     filename: str
     device_count: int
     point_count: int
-    devices: list[dict]
-    points: list[dict]
+    devices: list[dict[str, Any]]
+    points: list[dict[str, Any]]
 
 
 # ─── RAG Search ──────────────────────────────────────────────────────────
@@ -71,9 +71,16 @@ class SimilarResponse(BaseModel):
 # ─── Gitea Webhook ───────────────────────────────────────────────────────
 
 
+class CommitUser(BaseModel):
+    name: str = ""
+    email: str = ""
+
+
 class CommitInfo(BaseModel):
     id: str
     message: str = ""
+    author: Optional[CommitUser] = None
+    committer: Optional[CommitUser] = None
     added: list[str] = []
     modified: list[str] = []
     removed: list[str] = []
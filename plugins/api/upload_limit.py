@@ -0,0 +1,69 @@
+"""
+Upload size cap, enforced before the body is received.
+
+A FastAPI dependency taking ``File(...)`` only runs after the whole
+multipart body has been read and spooled, so it can't cap anything. This
+ASGI middleware rejects multipart requests on their declared
+Content-Length up front, and counts the bytes of bodies without one
+(chunked) as they arrive.
+"""
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import get_settings
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject multipart uploads larger than MAX_UPLOAD_BYTES with 413.
+
+    A declared Content-Length over the limit is answered before any of the
+    body is read. Otherwise the body is counted as the app receives it and
+    the request fails with 413 as soon as it passes the limit.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = get_settings().max_upload_bytes
+        try:
+            declared = int(headers.get("content-length", 0))
+        except ValueError:
+            await _error(400, "Invalid Content-Length header")(scope, receive, send)
+            return
+        if declared > limit:
+            await _error(413, f"Upload exceeds the {limit}-byte limit")(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Re-raised by FastAPI's body parsing and answered by
+                    # its exception handler
+                    raise HTTPException(
+                        status_code=413, detail=f"Upload exceeds the {limit}-byte limit"
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _error(status_code: int, detail: str) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code)
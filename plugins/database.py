@@ -20,7 +20,15 @@ def _get_engine():
     if _engine is None:
         settings = get_settings()
         _engine = create_async_engine(
-            settings.database_url, echo=False, pool_size=5, max_overflow=10
+            settings.database_url,
+            echo=False,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+            # Short OLTP queries; JIT compilation only adds latency
+            connect_args={"server_settings": {"jit": "off"}},
         )
         _async_session = async_sessionmaker(
             _engine, class_=AsyncSession, expire_on_commit=False
@@ -5,10 +5,12 @@ Provides RTAC config processing, RAG search, and similar-config finding
 as a companion service to vanilla Gitea.
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -16,26 +18,63 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup / shutdown hooks."""
-    # Auto-create tables if they don't exist
-    try:
-        from database import _get_engine
-        from models import Base
-        engine, _ = _get_engine()
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logger.info("Database tables verified / created")
-    except Exception as e:
-        logger.warning(f"Database migration skipped (will retry on first request): {e}")
+    from api.http_clients import get_gitea_client, get_cim_admin_client, close_http_clients
+    from rtac_plg.workers import warm_xml_pool, shutdown_xml_pool
+
+    async def _migrate():
+        # Auto-create tables if they don't exist
+        try:
+            from sqlalchemy import text
+            from database import _get_engine
+            from models import Base, SCHEMA_UPGRADES
+            engine, _ = _get_engine()
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                for stmt in SCHEMA_UPGRADES:
+                    try:
+                        async with conn.begin_nested():
+                            await conn.execute(text(stmt))
+                    except Exception as e:
+                        logger.warning(f"Schema upgrade failed ({stmt.strip()[:60]}…): {e}")
+            logger.info("Database tables verified / created")
+        except Exception as e:
+            logger.warning(f"Database migration skipped (will retry on first request): {e}")
+
+    async def _warm_pool():
+        # Process pool for CPU-bound XML parsing / profile generation
+        try:
+            await warm_xml_pool()
+            logger.info("XML process pool warmed")
+        except Exception as e:
+            logger.warning(f"XML process pool warm-up failed (workers start on demand): {e}")
+
+    # Open pooled outbound HTTP clients (Gitea + cim-admin)
+    get_gitea_client()
+    get_cim_admin_client()
+
+    # DB round-trips and worker spawn/imports overlap instead of running back to back
+    await asyncio.gather(_migrate(), _warm_pool())
+
     yield
 
+    await close_http_clients()
+    # Waits for any parse still running; keep that off the event loop
+    await asyncio.to_thread(shutdown_xml_pool)
+
 
 app = FastAPI(
     title="SCADA Studio Sidecar",
     description="RTAC config processing, RAG search, and similar-config finding for Gitea",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Caps multipart uploads before the body is spooled
+from api.upload_limit import UploadSizeLimitMiddleware  # noqa: E402
+
+app.add_middleware(UploadSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Gitea custom templates call this service
@@ -2,7 +2,7 @@
 SQLAlchemy models for SCADA Studio.
 """
 
-from sqlalchemy import Column, Integer, Text, Float, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, Text, Float, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, relationship
 from datetime import datetime, timezone
@@ -12,6 +12,48 @@ class Base(DeclarativeBase):
     pass
 
 
+# Idempotent DDL run after create_all() at startup — create_all() only
+# creates missing tables, so columns/indexes added later go here too.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE rtac_configs ADD COLUMN IF NOT EXISTS content_hash TEXT",
+    "CREATE INDEX IF NOT EXISTS idx_rtac_configs_content_hash"
+    " ON rtac_configs (repo, file_path, content_hash)",
+    # Trigram indexes so the ILIKE '%…%' searches (text_search, find_similar)
+    # use index scans
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    *(
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_{col}_trgm"
+        f" ON {table} USING gin ({col} gin_trgm_ops)"
+        for table, col in (
+            ("points", "name"),
+            ("points", "description"),
+            ("points", "source_tag"),
+            ("points", "destination_tag"),
+            ("rtac_configs", "device_name"),
+            ("rtac_configs", "file_path"),  # find_similar's query_text search
+        )
+    ),
+    # Recreate the device-mapping key as NULLS NOT DISTINCT (PostgreSQL 15+)
+    # so create_mapping's ON CONFLICT upsert matches NULL URIs.
+    """
+    DO $$
+    BEGIN
+      IF NOT EXISTS (
+        SELECT 1 FROM pg_indexes
+        WHERE tablename = 'device_mappings' AND indexname = 'uq_device_mapping'
+          AND indexdef LIKE '%NULLS NOT DISTINCT%'
+      ) THEN
+        ALTER TABLE device_mappings
+          DROP CONSTRAINT IF EXISTS device_mappings_substation_eq_uri_sc_device_uri_key;
+        ALTER TABLE device_mappings DROP CONSTRAINT IF EXISTS uq_device_mapping;
+        ALTER TABLE device_mappings ADD CONSTRAINT uq_device_mapping
+          UNIQUE NULLS NOT DISTINCT (substation, eq_uri, sc_device_uri);
+      END IF;
+    END $$
+    """,
+]
+
+
 class RtacConfig(Base):
     __tablename__ = "rtac_configs"
 
@@ -20,6 +62,7 @@ class RtacConfig(Base):
     file_path = Column(Text, nullable=False)
     commit_sha = Column(Text, nullable=False)
     device_name = Column(Text)
+    content_hash = Column(Text)  # blake2b-128 of the raw XML, for re-index short-circuit
     parsed_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     metadata_ = Column("metadata", JSONB, default=dict)
 
@@ -28,6 +71,7 @@ class RtacConfig(Base):
 
     __table_args__ = (
         UniqueConstraint("repo", "file_path", "commit_sha", name="uq_config_version"),
+        Index("idx_rtac_configs_content_hash", "repo", "file_path", "content_hash"),
     )
 
 
@@ -49,6 +93,17 @@ class Point(Base):
     config = relationship("RtacConfig", back_populates="points")
 
 
+class ScProfileHash(Base):
+    """Content hash of the RTAC XML each file's SC profile was last generated from."""
+    __tablename__ = "sc_profile_hashes"
+
+    repo = Column(Text, primary_key=True)
+    file_path = Column(Text, primary_key=True)
+    content_hash = Column(Text, nullable=False)  # blake2b-128, as rtac_configs.content_hash
+    profiled_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                         onupdate=lambda: datetime.now(timezone.utc))
+
+
 class DeviceMapping(Base):
     """Cross-profile device association: EQ  SC  PE."""
     __tablename__ = "device_mappings"
@@ -80,5 +135,10 @@ class DeviceMapping(Base):
     config = relationship("RtacConfig", back_populates="mappings")
 
     __table_args__ = (
-        UniqueConstraint("substation", "eq_uri", "sc_device_uri", name="uq_device_mapping"),
+        # NULLS NOT DISTINCT so ON CONFLICT upserts also match rows with a
+        # NULL eq_uri / sc_device_uri
+        UniqueConstraint(
+            "substation", "eq_uri", "sc_device_uri",
+            name="uq_device_mapping", postgresql_nulls_not_distinct=True,
+        ),
     )
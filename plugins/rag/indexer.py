@@ -5,25 +5,111 @@ Embedding/RAG search is handled externally by n8n workflows; this module
 just ensures parsed data is available in the DB for queries.
 """
 
+import asyncio
+import json
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from cachetools import LRUCache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
 from models import RtacConfig, Point
-from rtac_plg.parser import parse_rtac_xml_bytes
+from rag.search import invalidate_search_cache
+from rtac_plg.parser import XmlSource, parse_rtac_xml, xml_digest
+from rtac_plg.workers import run_xml_task
+
+# (repo, file_path, content_hash) → config_id for recently indexed content
+_hash_cache: "LRUCache[tuple[str, str, str], int]" = LRUCache(maxsize=1024)
+
+
+# Below this many points a multi-row INSERT is as fast as COPY's setup
+_COPY_MIN_ROWS = 1000
+
+_POINT_COLUMNS = (
+    "config_id", "name", "address", "point_type", "data_type", "description",
+    "source_tag", "destination_tag", "extra", "created_at",
+)
+
+
+# Parsed point keys stored in their own columns; the rest go to ``extra``
+_MAPPED_POINT_KEYS = frozenset({
+    "name", "address", "type", "data_type", "description", "source_tag", "destination_tag",
+})
+
+
+async def _copy_points(db: AsyncSession, rows: list[dict]) -> bool:
+    """
+    Bulk-load point rows with COPY (asyncpg binary protocol) inside the
+    session's transaction. Returns False if the driver has no COPY support.
+    """
+    raw = await (await db.connection()).get_raw_connection()
+    driver = raw.driver_connection
+    if not hasattr(driver, "copy_records_to_table"):
+        return False
+    await driver.copy_records_to_table(
+        Point.__tablename__,
+        records=[
+            tuple(json.dumps(r[c]) if c == "extra" else r[c] for c in _POINT_COLUMNS)
+            for r in rows
+        ],
+        columns=_POINT_COLUMNS,
+    )
+    return True
 
 
 async def index_config(
     db: AsyncSession,
-    xml_bytes: bytes,
+    xml_bytes: XmlSource,
     repo: str,
     file_path: str,
     commit_sha: str,
     filename: str,
+    content_hash: str | None = None,
+    batch_size: int = 500,
+    db_lock: asyncio.Lock | None = None,
 ) -> int:
     """
-    Parse an RTAC XML file and store config + points in the database.
-    Returns the config_id.
+    Parse an RTAC XML file (bytes or binary file object) and store
+    config + points in the database. Returns the config_id.
+
+    If this file's exact content was already indexed (same repo, path and
+    content hash — e.g. a force-push or webhook retry), the existing
+    config_id is returned without re-parsing. Large point sets are
+    bulk-loaded with COPY; smaller ones (or drivers without COPY) are
+    inserted ``batch_size`` rows per statement.
+
+    Callers sharing ``db`` between concurrent tasks pass ``db_lock``; it is
+    held only around session I/O, not while the XML is parsed.
     """
+    content_hash = content_hash or xml_digest(xml_bytes)
+    key = (repo, file_path, content_hash)
+    if (cached_id := _hash_cache.get(key)) is not None:
+        return cached_id
+
+    lock = db_lock or nullcontext()
+    async with lock:
+        config_id = await _find_indexed(db, repo, file_path, commit_sha, content_hash)
+    if config_id is not None:
+        return config_id
+
+    # Parse XML (off the event loop)
+    devices, points = await run_xml_task(parse_rtac_xml, xml_bytes, filename=filename)
+
+    async with lock:
+        config_id = await _store_config(
+            db, devices, points, repo=repo, file_path=file_path,
+            commit_sha=commit_sha, content_hash=content_hash, batch_size=batch_size,
+        )
+    _hash_cache[key] = config_id
+    invalidate_search_cache()
+    return config_id
+
+
+async def _find_indexed(
+    db: AsyncSession, repo: str, file_path: str, commit_sha: str, content_hash: str
+) -> int | None:
+    """config_id already holding this file at this commit or content, if any."""
     # Check if already indexed
     existing = await db.execute(
         select(RtacConfig).where(
@@ -35,35 +121,66 @@ async def index_config(
     if row := existing.scalar_one_or_none():
         return row.id
 
-    # Parse XML
-    devices, points = parse_rtac_xml_bytes(xml_bytes, filename=filename)
+    # Check for identical content under another commit
+    same_content = await db.execute(
+        select(RtacConfig.id)
+        .where(
+            RtacConfig.repo == repo,
+            RtacConfig.file_path == file_path,
+            RtacConfig.content_hash == content_hash,
+        )
+        .order_by(RtacConfig.id.desc())
+        .limit(1)
+    )
+    if (config_id := same_content.scalar_one_or_none()) is not None:
+        _hash_cache[(repo, file_path, content_hash)] = config_id
+    return config_id
+
 
+async def _store_config(
+    db: AsyncSession,
+    devices: list[dict],
+    points: list[dict],
+    repo: str,
+    file_path: str,
+    commit_sha: str,
+    content_hash: str,
+    batch_size: int,
+) -> int:
+    """Insert the config record and its points; returns the new config_id."""
     # Store config record
     config = RtacConfig(
         repo=repo,
         file_path=file_path,
         commit_sha=commit_sha,
         device_name=devices[0].get("name") if devices else None,
+        content_hash=content_hash,
         metadata_={"device_count": len(devices), "point_count": len(points)},
     )
     db.add(config)
     await db.flush()  # get config.id
 
-    # Store points
-    for p in points:
-        db.add(Point(
-            config_id=config.id,
-            name=p.get("name", ""),
-            address=p.get("address"),
-            point_type=p.get("type"),
-            data_type=p.get("data_type"),
-            description=p.get("description"),
-            source_tag=p.get("source_tag"),
-            destination_tag=p.get("destination_tag"),
-            extra={k: v for k, v in p.items()
-                   if k not in ("name", "address", "type", "data_type",
-                                "description", "source_tag", "destination_tag")},
-        ))
+    # Store points — COPY for large configs when the driver supports it,
+    # otherwise Core executemany in batches (multi-row INSERT ... VALUES)
+    created_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "config_id": config.id,
+            "name": p.get("name", ""),
+            "address": p.get("address"),
+            "point_type": p.get("type"),
+            "data_type": p.get("data_type"),
+            "description": p.get("description"),
+            "source_tag": p.get("source_tag"),
+            "destination_tag": p.get("destination_tag"),
+            "extra": {k: v for k, v in p.items() if k not in _MAPPED_POINT_KEYS},
+            "created_at": created_at,
+        }
+        for p in points
+    ]
+    if len(rows) < _COPY_MIN_ROWS or not await _copy_points(db, rows):
+        for start in range(0, len(rows), batch_size):
+            await db.execute(insert(Point), rows[start:start + batch_size])
 
     await db.commit()
     return config.id
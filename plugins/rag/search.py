@@ -5,11 +5,26 @@ Semantic/vector search is handled by n8n workflows. This module provides
 simple SQL-based text search for the sidecar API.
 """
 
+from cachetools import TTLCache
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from api.schemas import SearchResult
 
+# (index version, query, top_k) → results. Bumping the version on every
+# index makes older entries unreachable; the TTL bounds staleness from
+# indexes done by other worker processes.
+_search_cache: "TTLCache[tuple[int, str, int], list[SearchResult]]" = TTLCache(
+    maxsize=512, ttl=60
+)
+_index_version = 0
+
+
+def invalidate_search_cache() -> None:
+    """Called after new configs are indexed."""
+    global _index_version
+    _index_version += 1
+
 
 async def text_search(
     db: AsyncSession,
@@ -18,8 +33,14 @@ async def text_search(
 ) -> list[SearchResult]:
     """
     Full-text search across config metadata and point names/descriptions.
-    Uses PostgreSQL ILIKE for simplicity.
+    Uses PostgreSQL ILIKE, served by pg_trgm GIN indexes on each searched
+    column (queries under 3 characters still scan). Repeat queries are
+    served from a short-lived in-process cache.
     """
+    key = (_index_version, query, top_k)
+    if (cached := _search_cache.get(key)) is not None:
+        return cached
+
     pattern = f"%{query}%"
 
     sql = text("""
@@ -43,7 +64,7 @@ async def text_search(
     result = await db.execute(sql, {"pattern": pattern, "k": top_k})
     rows = result.fetchall()
 
-    return [
+    results = [
         SearchResult(
             config_id=r.config_id,
             repo=r.repo,
@@ -53,3 +74,5 @@ async def text_search(
         )
         for r in rows
     ]
+    _search_cache[key] = results
+    return results
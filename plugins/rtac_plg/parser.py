@@ -2,11 +2,48 @@
 RTAC XML Parser — adapted from rtac-plg/src/parse_rtac_xml.py for in-memory use.
 
 Parses RTAC XML exports (from AcRTACcmd.exe) and extracts devices + point records.
-Works with bytes (uploaded files or Gitea fetches) rather than filesystem paths.
+Works with bytes or binary file objects (uploaded files or Gitea fetches)
+rather than filesystem paths.
 """
 
-import xml.etree.ElementTree as ET
-from typing import Dict, List, Tuple
+import hashlib
+import io
+from functools import lru_cache
+from sys import intern
+from typing import BinaryIO, Dict, List, Tuple, Union
+
+from lxml import etree
+
+# Raw XML content, or a binary file object positioned at the start of it
+XmlSource = Union[bytes, BinaryIO]
+
+# libxml2 options shared by the tree and streaming parsers. Comments/PIs are
+# dropped so element iteration only sees elements; entities are not resolved.
+_PARSER_OPTIONS = dict(
+    huge_tree=True,
+    remove_blank_text=True,
+    remove_comments=True,
+    remove_pis=True,
+    resolve_entities=False,
+)
+_parser = etree.XMLParser(**_PARSER_OPTIONS)
+
+
+def xml_digest(source: XmlSource) -> str:
+    """
+    Content hash (blake2b-128, hex) of an XML source.
+
+    File objects are hashed in chunks and rewound afterwards so they can
+    still be parsed.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (bytes, bytearray)):
+        h.update(source)
+    else:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            h.update(chunk)
+        source.seek(0)
+    return h.hexdigest()
 
 POINT_TAGS = {
     "point", "Point", "Tag", "tag",
@@ -14,7 +51,26 @@ POINT_TAGS = {
 }
 
 
-def _extract_point(elem: ET.Element) -> Dict:
+# Elements whose subtrees are read after they close; nothing beneath an
+# open one of these may be discarded while streaming
+_HOLD_TAGS = POINT_TAGS | {"Device", "TagList"}
+
+
+# Point dicts repeat the same few keys and type codes thousands of times.
+# Sharing one str object per distinct value keeps the parsed lists small,
+# and pickle (results come back from the XML process pool) writes each
+# shared object once and back-references it after that.
+def _intern(value: str | None) -> str | None:
+    return intern(value) if value is not None else None
+
+
+@lru_cache(maxsize=1024)
+def _setting_key(column: str) -> str:
+    """TagList column title → point dict key ("Data Type" → "data_type")."""
+    return intern(column.lower().replace(" ", "_"))
+
+
+def _extract_point(elem: etree._Element) -> Dict:
     """Extract a generic point record from an XML element."""
     data: Dict = {}
     for child in elem:
@@ -25,36 +81,29 @@ def _extract_point(elem: ET.Element) -> Dict:
         elif tag in ("address", "addr", "ioaddress"):
             data["address"] = text
         elif tag in ("type", "pointtype", "datatype"):
-            data["type"] = text
+            data["type"] = intern(text)
         elif tag in ("units", "unit", "uom"):
             data["units"] = text
         elif tag in ("description", "desc"):
             data["description"] = text
         else:
-            data[child.tag] = text
+            data[intern(child.tag)] = text
     return data
 
 
-def _get_setting_value(row: ET.Element, column_name: str) -> str:
-    for setting in row.findall("Setting"):
-        col = setting.find("Column")
-        val = setting.find("Value")
-        if col is not None and val is not None and col.text == column_name:
-            return val.text or ""
-    return ""
-
-
 def _parse_rtac_taglist(
-    root: ET.Element, filename: str, map_name: str = ""
+    root: etree._Element, filename: str, map_name: str = ""
 ) -> List[Dict]:
     """Parse RTAC TagList format (DNP/Modbus device exports)."""
     points: List[Dict] = []
     for row in root.findall(".//SettingPage/Row"):
-        settings = {
-            s.find("Column").text: s.find("Value").text
-            for s in row.findall("Setting")
-            if s.find("Column") is not None and s.find("Value") is not None
-        }
+        # One pass per row: a single find() for Column and Value per Setting
+        settings = {}
+        for s in row.iterchildren("Setting"):
+            col = s.find("Column")
+            val = s.find("Value")
+            if col is not None and val is not None:
+                settings[col.text] = val.text
 
         if settings.get("Enable", "").lower() != "true":
             continue
@@ -65,7 +114,7 @@ def _parse_rtac_taglist(
         if "Point Number" in settings:
             point_data["address"] = settings["Point Number"]
         if "Tag Type" in settings:
-            point_data["type"] = settings["Tag Type"]
+            point_data["type"] = _intern(settings["Tag Type"])
         if "Comment" in settings and settings["Comment"]:
             point_data["description"] = settings["Comment"]
         if map_name:
@@ -74,7 +123,7 @@ def _parse_rtac_taglist(
         # Extra settings
         skip = {"tag_name", "point_number", "tag_type", "comment", "enable"}
         for col, val in settings.items():
-            key = col.lower().replace(" ", "_")
+            key = _setting_key(col)
             if key not in skip:
                 point_data[key] = val
 
@@ -85,15 +134,19 @@ def _parse_rtac_taglist(
     return points
 
 
-def _parse_device(root: ET.Element, filename: str) -> Tuple[List[Dict], List[Dict]]:
+def _parse_device(root: etree._Element, filename: str) -> Tuple[List[Dict], List[Dict]]:
+    """Parse the first Device element under root."""
+    device = root.find(".//Device")
+    if device is None:
+        return [], []
+    return _parse_device_element(device, filename)
+
+
+def _parse_device_element(device: etree._Element, filename: str) -> Tuple[List[Dict], List[Dict]]:
     """Parse a single Device element — captures ALL device types (server + client)."""
     points: List[Dict] = []
     devices: List[Dict] = []
 
-    device = root.find(".//Device")
-    if device is None:
-        return devices, points
-
     device_name_el = device.find(".//Name")
     device_name = device_name_el.text if device_name_el is not None else filename
 
@@ -125,7 +178,7 @@ def _parse_device(root: ET.Element, filename: str) -> Tuple[List[Dict], List[Dic
 
         # Extract Map Name from connection settings (DNPServer devices)
         for row in connection.findall(".//Row"):
-            settings_in_row = row.findall("Setting")
+            settings_in_row = list(row.iterchildren("Setting"))
             if len(settings_in_row) >= 2:
                 first_col = settings_in_row[0].find("Column")
                 first_val = settings_in_row[0].find("Value")
@@ -169,12 +222,82 @@ def parse_rtac_xml_bytes(
 
     Tries Device structure first, then TagList, then generic point extraction.
     """
-    root = ET.fromstring(xml_bytes)
+    root = etree.fromstring(xml_bytes, _parser)
     return parse_rtac_xml_root(root, filename)
 
 
+def parse_rtac_xml_stream(
+    fp: BinaryIO, filename: str = "upload.xml"
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Parse RTAC XML from a binary file object. Returns (devices, points).
+
+    The file is parsed incrementally and each subtree is discarded once it
+    has been handled, so memory stays bounded by the largest Device /
+    TagList / point element rather than the whole document. Results match
+    parse_rtac_xml_root() on the full tree.
+    """
+    device_el = None  # first <Device> below the root, in document order
+    device_result: Tuple[List[Dict], List[Dict]] = ([], [])
+    taglists: List[List[Dict]] = []  # per-TagList points, in document order
+    generic: List[Dict | None] = []  # fallback points, in document order
+    slots: Dict[etree._Element, int] = {}
+    stack: List[etree._Element] = []
+    held = 0  # open ancestors whose subtree is still needed
+
+    for event, elem in etree.iterparse(fp, events=("start", "end"), **_PARSER_OPTIONS):
+        tag = elem.tag
+        if event == "start":
+            if stack and device_el is None:
+                if tag == "Device":
+                    device_el = elem
+                elif tag == "TagList":
+                    slots[elem] = len(taglists)
+                    taglists.append([])
+            if tag in POINT_TAGS and device_el is None and not taglists:
+                slots[elem] = len(generic)
+                generic.append(None)
+            if tag in _HOLD_TAGS:
+                held += 1
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if tag in _HOLD_TAGS:
+            held -= 1
+        if elem is device_el:
+            device_result = _parse_device_element(elem, filename)
+        elif (i := slots.pop(elem, None)) is not None:
+            if tag == "TagList":
+                taglists[i] = _parse_rtac_taglist(elem, filename)
+            else:
+                p = _extract_point(elem)
+                if "name" not in p:
+                    p["name"] = elem.attrib.get("name") or elem.attrib.get("id", "")
+                p["_source_file"] = filename
+                generic[i] = p
+        if held == 0 and stack:
+            elem.clear()
+            stack[-1].remove(elem)
+
+    if device_el is not None:
+        return device_result
+    if taglists:
+        return [], [p for points in taglists for p in points]
+    return [], [p for p in generic if p is not None]
+
+
+def parse_rtac_xml(
+    source: XmlSource, filename: str = "upload.xml"
+) -> Tuple[List[Dict], List[Dict]]:
+    """Parse RTAC XML from bytes or a binary file object (streamed)."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return parse_rtac_xml_stream(source, filename)
+
+
 def parse_rtac_xml_root(
-    root: ET.Element, filename: str = "upload.xml"
+    root: etree._Element, filename: str = "upload.xml"
 ) -> Tuple[List[Dict], List[Dict]]:
     """Parse from an already-parsed ElementTree root."""
     # Try Device structure
@@ -190,19 +313,18 @@ def parse_rtac_xml_root(
             points.extend(_parse_rtac_taglist(tl, filename))
         return [], points
 
-    # Generic point extraction
-    for elem in root.iter():
-        if elem.tag in POINT_TAGS:
-            p = _extract_point(elem)
-            if "name" not in p:
-                p["name"] = elem.attrib.get("name") or elem.attrib.get("id", "")
-            p["_source_file"] = filename
-            points.append(p)
+    # Generic point extraction (tag filtering happens inside libxml2)
+    for elem in root.iter(*POINT_TAGS):
+        p = _extract_point(elem)
+        if "name" not in p:
+            p["name"] = elem.attrib.get("name") or elem.attrib.get("id", "")
+        p["_source_file"] = filename
+        points.append(p)
 
     return [], points
 
 
-def extract_points(xml_bytes: bytes, filename: str = "upload.xml") -> List[Dict]:
+def extract_points(xml_bytes: XmlSource, filename: str = "upload.xml") -> List[Dict]:
     """Convenience: parse and return just the points list."""
-    _, points = parse_rtac_xml_bytes(xml_bytes, filename)
+    _, points = parse_rtac_xml(xml_bytes, filename)
     return points
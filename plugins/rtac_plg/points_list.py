@@ -8,11 +8,14 @@ Returns data directly (no filesystem I/O) for API use.
 import csv
 import io
 import json
-from typing import List, Dict
+from typing import Dict, Iterator, List
 
 from fastapi.responses import JSONResponse, StreamingResponse
 
-from rtac_plg.parser import parse_rtac_xml_bytes
+from rtac_plg.parser import XmlSource, parse_rtac_xml
+
+# Rows serialized per chunk of a streamed CSV response
+_CSV_BATCH_ROWS = 1000
 
 # Default schema columns when no schema file is provided
 DEFAULT_COLUMNS = [
@@ -50,25 +53,51 @@ def _map_point_type(point: Dict) -> str:
     return DEFAULT_TYPE_MAP.get(dt.upper(), dt)
 
 
-def _map_rows(points: List[Dict], columns: List[Dict] | None = None) -> List[Dict]:
-    """Map raw point dicts to schema-defined column structure."""
+def _iter_rows(points: List[Dict], columns: List[Dict] | None = None) -> Iterator[Dict]:
+    """Map raw point dicts to schema-defined column structure, lazily."""
     cols = columns or DEFAULT_COLUMNS
-    rows = []
+    # Resolve (title, field) once rather than per cell
+    pairs = [(c.get("title", c["field"]), c["field"]) for c in cols]
     for p in points:
-        row = {}
-        for c in cols:
-            field = c["field"]
-            title = c.get("title", field)
-            row[title] = p.get(field, "")
+        get = p.get
+        row = {title: get(field, "") for title, field in pairs}
         # Derive point type if missing
         if not row.get("Point Type"):
             row["Point Type"] = _map_point_type(p)
-        rows.append(row)
-    return rows
+        yield row
+
+
+def _map_rows(points: List[Dict], columns: List[Dict] | None = None) -> List[Dict]:
+    """Map raw point dicts to schema-defined column structure."""
+    return list(_iter_rows(points, columns))
+
+
+def _iter_csv(points: List[Dict], columns: List[Dict] | None = None) -> Iterator[str]:
+    """
+    Yield the points list as CSV text, _CSV_BATCH_ROWS rows at a time.
+
+    Rows are mapped as they are written, so neither the full row list nor
+    the full CSV string is held in memory. Yields nothing for no points.
+    """
+    rows = _iter_rows(points, columns)
+    first = next(rows, None)
+    if first is None:
+        return
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=first.keys())
+    writer.writeheader()
+    writer.writerow(first)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % _CSV_BATCH_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
 
 
 def generate(
-    xml_bytes: bytes,
+    xml_bytes: XmlSource,
     filename: str = "upload.xml",
     output_format: str = "json",
     columns: List[Dict] | None = None,
@@ -77,7 +106,7 @@ def generate(
     Parse RTAC XML and return a points list.
 
     Args:
-        xml_bytes: raw XML content
+        xml_bytes: raw XML content (bytes or binary file object)
         filename: original filename (for metadata)
         output_format: "json" or "csv"
         columns: optional schema columns override
@@ -85,29 +114,17 @@ def generate(
     Returns:
         FastAPI response (JSON or streaming CSV)
     """
-    _, points = parse_rtac_xml_bytes(xml_bytes, filename)
-    rows = _map_rows(points, columns)
+    _, points = parse_rtac_xml(xml_bytes, filename)
 
     if output_format == "csv":
-        if not rows:
-            return StreamingResponse(
-                io.StringIO(""),
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename={filename}.csv"},
-            )
-
-        buf = io.StringIO()
-        writer = csv.DictWriter(buf, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
-        buf.seek(0)
-
+        # Sync iterator: Starlette drains it in a worker thread while sending
         return StreamingResponse(
-            buf,
+            _iter_csv(points, columns),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename={filename}.csv"},
         )
 
+    rows = _map_rows(points, columns)
     return JSONResponse(content={
         "filename": filename,
         "point_count": len(rows),
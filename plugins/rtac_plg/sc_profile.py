@@ -14,10 +14,15 @@ Profile links to the EQ (Equipment) profile via shared mRIDs.
 
 import uuid
 import hashlib
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
-import xml.etree.ElementTree as ET
-from xml.etree.ElementTree import Element, SubElement, ElementTree, indent, tostring
+from functools import lru_cache
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from lxml import etree
+from lxml.etree import Element, QName, SubElement
+
+if TYPE_CHECKING:
+    from rtac_plg.parser import XmlSource
 
 # ─── Namespace URIs ──────────────────────────────────────────────────────
 
@@ -27,53 +32,169 @@ MD_NS = "http://iec.ch/TC57/61970-552/ModelDescription/1#"
 VER_NS = "http://verance.ai/CIM/SecondarySystem/1#"
 PROFILE_URI = "http://verance.ai/CIM/SCADAConfiguration/1"
 
+# Prefixes declared once on the rdf:RDF root
+_NSMAP = {"cim": CIM_NS, "md": MD_NS, "rdf": RDF_NS, "ver": VER_NS}
+
+# ─── Qualified names ─────────────────────────────────────────────────────
+# Built once here rather than formatted for every element; lxml takes
+# QName objects as tags/attribute keys without re-parsing "{ns}local"
+
+_RDF_ROOT = QName(RDF_NS, "RDF")
+_RDF_ID = QName(RDF_NS, "ID")
+_RDF_ABOUT = QName(RDF_NS, "about")
+_RDF_RESOURCE = QName(RDF_NS, "resource")
+
+_CIM_REMOTE_UNIT = QName(CIM_NS, "RemoteUnit")
+_CIM_ANALOG = QName(CIM_NS, "Analog")
+_CIM_DISCRETE = QName(CIM_NS, "Discrete")
+_CIM_ACCUMULATOR = QName(CIM_NS, "Accumulator")
+_CIM_CONTROL = QName(CIM_NS, "Control")
+_CIM_REMOTE_SOURCE = QName(CIM_NS, "RemoteSource")
+_CIM_REMOTE_CONTROL = QName(CIM_NS, "RemoteControl")
+_CIM_IO_NAME = QName(CIM_NS, "IdentifiedObject.name")
+_CIM_IO_MRID = QName(CIM_NS, "IdentifiedObject.mRID")
+_CIM_IO_DESCRIPTION = QName(CIM_NS, "IdentifiedObject.description")
+_CIM_RU_TYPE = QName(CIM_NS, "RemoteUnit.remoteUnitType")
+_CIM_MEAS_TYPE = QName(CIM_NS, "Measurement.measurementType")
+_CIM_MEAS_PSR = QName(CIM_NS, "Measurement.PowerSystemResource")
+_CIM_CONTROL_PSR = QName(CIM_NS, "Control.PowerSystemResource")
+_CIM_RC_CONTROL = QName(CIM_NS, "RemoteControl.Control")
+_CIM_RS_MEAS_VALUE = QName(CIM_NS, "RemoteSource.MeasurementValue")
+_CIM_RP_REMOTE_UNIT = QName(CIM_NS, "RemotePoint.RemoteUnit")
+
+_MD_FULL_MODEL = QName(MD_NS, "FullModel")
+_MD_SCENARIO_TIME = QName(MD_NS, "Model.scenarioTime")
+_MD_CREATED = QName(MD_NS, "Model.created")
+_MD_DESCRIPTION = QName(MD_NS, "Model.description")
+_MD_AUTHORITY_SET = QName(MD_NS, "Model.modelingAuthoritySet")
+_MD_PROFILE = QName(MD_NS, "Model.profile")
+_MD_DEPENDENT_ON = QName(MD_NS, "Model.DependentOn")
+
+_VER_RU_SOURCE_FILE = QName(VER_NS, "RemoteUnit.sourceFile")
+_VER_RU_MAP_NAME = QName(VER_NS, "RemoteUnit.mapName")
+_VER_RU_PROTOCOL = QName(VER_NS, "RemoteUnit.protocol")
+_VER_RU_ROLE = QName(VER_NS, "RemoteUnit.role")
+_VER_RU_MANUFACTURER = QName(VER_NS, "RemoteUnit.manufacturer")
+_VER_RU_MODEL = QName(VER_NS, "RemoteUnit.model")
+_VER_SP_DNP3_ADDRESS = QName(VER_NS, "SCADAPoint.dnp3Address")
+_VER_SP_PROTOCOL = QName(VER_NS, "SCADAPoint.protocol")
+_VER_SP_DATA_TYPE = QName(VER_NS, "SCADAPoint.dataType")
+_VER_SP_TAG_NAME = QName(VER_NS, "SCADAPoint.tagName")
+_VER_SP_SOURCE_FILE = QName(VER_NS, "SCADAPoint.sourceFile")
+
 # ─── RTAC data type → CIM measurement class mapping ─────────────────────
 
-_RTAC_TO_CIM_CLASS = {
+
+class _PointInfo(NamedTuple):
+    """Everything add_points needs to know about an RTAC data type."""
+    cim_tag: QName     # measurement / control element
+    point_type: str    # AI, BI, CT, AO, BO
+    is_control: bool
+    stats_key: str
+    psr_tag: QName     # PowerSystemResource link element
+
+
+_ANALOG = _PointInfo(_CIM_ANALOG, "AI", False, "analog_points", _CIM_MEAS_PSR)
+_DISCRETE = _PointInfo(_CIM_DISCRETE, "BI", False, "discrete_points", _CIM_MEAS_PSR)
+_ACCUMULATOR = _PointInfo(_CIM_ACCUMULATOR, "CT", False, "accumulator_points", _CIM_MEAS_PSR)
+_ANALOG_CONTROL = _PointInfo(_CIM_CONTROL, "AO", True, "control_points", _CIM_CONTROL_PSR)
+_COMMAND = _PointInfo(_CIM_CONTROL, "BO", True, "control_points", _CIM_CONTROL_PSR)
+
+# Unknown data types are treated as binary inputs
+_DEFAULT_INFO = _DISCRETE
+
+_RTAC_INFO: Dict[str, _PointInfo] = {
     # Analog Inputs
-    "MV": "Analog",
-    "CMV": "Analog",
-    "INT": "Analog",
-    "INS": "Analog",
+    "MV": _ANALOG,
+    "CMV": _ANALOG,
+    "INT": _ANALOG,
+    "INS": _ANALOG,
     # Binary Inputs
-    "SPS": "Discrete",
-    "BOOL": "Discrete",
-    "DPS": "Discrete",
+    "SPS": _DISCRETE,
+    "BOOL": _DISCRETE,
+    "DPS": _DISCRETE,
     # Counters
-    "BCR": "Accumulator",
+    "BCR": _ACCUMULATOR,
     # Analog Outputs / Controls
-    "APC": "AnalogControl",
-    "INC": "AnalogControl",
-    "operAPC": "AnalogControl",
+    "APC": _ANALOG_CONTROL,
+    "INC": _ANALOG_CONTROL,
+    "operAPC": _ANALOG_CONTROL,
     # Binary Outputs / Controls
-    "SPC": "Command",
-    "DPC": "Command",
-    "operSPC": "Command",
+    "SPC": _COMMAND,
+    "DPC": _COMMAND,
+    "operSPC": _COMMAND,
 }
 
-_RTAC_TO_POINT_TYPE = {
-    "MV": "AI", "CMV": "AI", "INT": "AI", "INS": "AI",
-    "SPS": "BI", "BOOL": "BI", "DPS": "BI",
-    "BCR": "CT",
-    "APC": "AO", "INC": "AO", "operAPC": "AO",
-    "SPC": "BO", "DPC": "BO", "operSPC": "BO",
-}
 
-_CONTROL_TYPES = {"operAPC", "operSPC", "APC", "INC", "SPC", "DPC"}
+# SHA-1 state after hashing NAMESPACE_URL; copied per call instead of
+# rehashing the namespace
+_UUID5_URL_SHA1 = hashlib.sha1(uuid.NAMESPACE_URL.bytes, usedforsecurity=False)
 
 
 def _deterministic_uuid(namespace: str, *parts: str) -> str:
-    """Generate a deterministic UUID from namespace + parts for reproducibility."""
-    seed = "|".join([namespace] + list(parts))
-    return str(uuid.uuid5(uuid.NAMESPACE_URL, seed))
-
+    """
+    Generate a deterministic UUID from namespace + parts for reproducibility.
 
+    Same value as str(uuid.uuid5(uuid.NAMESPACE_URL, seed)), formatted
+    straight from the digest without building a UUID object.
+    """
+    seed = "|".join((namespace, *parts))
+    h = _UUID5_URL_SHA1.copy()
+    h.update(seed.encode())
+    b = bytearray(h.digest()[:16])
+    b[6] = (b[6] & 0x0F) | 0x50  # version 5
+    b[8] = (b[8] & 0x3F) | 0x80  # RFC 4122 variant
+    x = b.hex()
+    return f"{x[:8]}-{x[8:12]}-{x[12:16]}-{x[16:20]}-{x[20:]}"
+
+
+# Output sections, in document order (after the FullModel header)
+(
+    _SECTION_REMOTE_UNITS,
+    _SECTION_MEASUREMENTS,
+    _SECTION_REMOTE_SOURCES,
+    _SECTION_REMOTE_CONTROLS,
+    _SECTION_COMM_LINKS,
+    _SECTION_DATAFLOWS,
+) = range(6)
+
+
+# mRIDs are a pure function of their inputs; pool workers are long-lived
+# and regenerating a substation's profile re-derives mostly the same ones
+@lru_cache(maxsize=1 << 16)
 def _make_mrid(prefix: str, *parts: str) -> str:
     """Create a prefixed mRID like '_sc-<uuid>'."""
     uid = _deterministic_uuid(prefix, *parts)
     return f"_{prefix}-{uid}"
 
 
+def model_timestamp() -> str:
+    """Current UTC time in the FullModel header format."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _build_fullmodel_header(
+    parent: etree._Element,
+    model_urn: str,
+    timestamp: str,
+    description: str,
+    substation_name: str,
+    eq_model_urn: Optional[str],
+    pe_model_urn: Optional[str],
+) -> etree._Element:
+    """Append the md:FullModel header describing the profile to ``parent``."""
+    header = SubElement(parent, _MD_FULL_MODEL, {_RDF_ABOUT: model_urn})
+    SubElement(header, _MD_SCENARIO_TIME).text = timestamp
+    SubElement(header, _MD_CREATED).text = timestamp
+    SubElement(header, _MD_DESCRIPTION).text = description
+    SubElement(header, _MD_AUTHORITY_SET).text = f"http://verance.ai/SA/{substation_name}"
+    SubElement(header, _MD_PROFILE).text = PROFILE_URI
+    for dependency in (eq_model_urn, pe_model_urn):
+        if dependency:
+            SubElement(header, _MD_DEPENDENT_ON, {_RDF_RESOURCE: dependency})
+    return header
+
+
 # ─── RDF/XML Builder ─────────────────────────────────────────────────────
 
 
@@ -109,13 +230,15 @@ class SCProfileBuilder:
         # Maps RTAC tag names/patterns → CIM equipment mRIDs from EQ profile
         self.equipment_mapping = equipment_mapping or {}
 
-        # Collected elements
-        self._remote_units: Dict[str, Element] = {}   # map_name → element
-        self._measurements: List[Element] = []
-        self._remote_sources: List[Element] = []
-        self._remote_controls: List[Element] = []
-        self._comm_links: List[Element] = []
-        self._dataflows: List[Element] = []
+        # All elements are built in place under the one document root, so
+        # nothing is copied or re-parented at serialize time; each section's
+        # last element marks where the next one of that section goes.
+        # serialize() only adds (and removes again) the FullModel header.
+        self._root = Element(_RDF_ROOT, nsmap=_NSMAP)
+        self._section_tails: List[Optional[etree._Element]] = [None] * (_SECTION_DATAFLOWS + 1)
+        # map_name → (element, mRID)
+        self._remote_units: Dict[str, Tuple[etree._Element, str]] = {}
+        self._single_rtu_mrid: Optional[str] = None  # set while exactly one RTU exists
 
         # Stats
         self.stats = {
@@ -153,13 +276,12 @@ class SCProfileBuilder:
 
             mrid = _make_mrid("rtu", self.substation_name, map_name)
 
-            rtu = Element(f"{{{CIM_NS}}}RemoteUnit")
-            rtu.set(f"{{{RDF_NS}}}ID", mrid)
+            rtu = self._new_remote_unit(map_name, mrid)
 
-            name_el = SubElement(rtu, f"{{{CIM_NS}}}IdentifiedObject.name")
+            name_el = SubElement(rtu, _CIM_IO_NAME)
             name_el.text = device_name
 
-            mrid_el = SubElement(rtu, f"{{{CIM_NS}}}IdentifiedObject.mRID")
+            mrid_el = SubElement(rtu, _CIM_IO_MRID)
             mrid_el.text = mrid
 
             # Map role to CIM RemoteUnitType
@@ -170,35 +292,34 @@ class SCProfileBuilder:
             else:
                 ru_type = "RemoteUnitType.RTU"
 
-            type_el = SubElement(rtu, f"{{{CIM_NS}}}RemoteUnit.remoteUnitType")
-            type_el.set(f"{{{RDF_NS}}}resource", f"{CIM_NS}{ru_type}")
+            type_el = SubElement(rtu, _CIM_RU_TYPE)
+            type_el.set(_RDF_RESOURCE, f"{CIM_NS}{ru_type}")
 
             # Verance extensions
             if source_file:
-                sf_el = SubElement(rtu, f"{{{VER_NS}}}RemoteUnit.sourceFile")
+                sf_el = SubElement(rtu, _VER_RU_SOURCE_FILE)
                 sf_el.text = source_file
 
             if map_name:
-                mn_el = SubElement(rtu, f"{{{VER_NS}}}RemoteUnit.mapName")
+                mn_el = SubElement(rtu, _VER_RU_MAP_NAME)
                 mn_el.text = map_name
 
             if protocol:
-                pr_el = SubElement(rtu, f"{{{VER_NS}}}RemoteUnit.protocol")
+                pr_el = SubElement(rtu, _VER_RU_PROTOCOL)
                 pr_el.text = protocol
 
             if role:
-                rl_el = SubElement(rtu, f"{{{VER_NS}}}RemoteUnit.role")
+                rl_el = SubElement(rtu, _VER_RU_ROLE)
                 rl_el.text = role
 
             if manufacturer:
-                mf_el = SubElement(rtu, f"{{{VER_NS}}}RemoteUnit.manufacturer")
+                mf_el = SubElement(rtu, _VER_RU_MANUFACTURER)
                 mf_el.text = manufacturer
 
             if model:
-                md_el = SubElement(rtu, f"{{{VER_NS}}}RemoteUnit.model")
+                md_el = SubElement(rtu, _VER_RU_MODEL)
                 md_el.text = model
 
-            self._remote_units[map_name] = rtu
             self.stats["remote_units"] += 1
 
     def set_rtu_identity(self, rtu_name: str) -> None:
@@ -214,24 +335,54 @@ class SCProfileBuilder:
         """
         mrid = _make_mrid("rtac", self.substation_name, rtu_name)
 
-        rtu = Element(f"{{{CIM_NS}}}RemoteUnit")
-        rtu.set(f"{{{RDF_NS}}}ID", mrid)
+        rtu = self._new_remote_unit(f"__rtac__{rtu_name}", mrid)
 
-        name_el = SubElement(rtu, f"{{{CIM_NS}}}IdentifiedObject.name")
+        name_el = SubElement(rtu, _CIM_IO_NAME)
         name_el.text = rtu_name
 
-        mrid_el = SubElement(rtu, f"{{{CIM_NS}}}IdentifiedObject.mRID")
+        mrid_el = SubElement(rtu, _CIM_IO_MRID)
         mrid_el.text = mrid
 
-        type_el = SubElement(rtu, f"{{{CIM_NS}}}RemoteUnit.remoteUnitType")
-        type_el.set(f"{{{RDF_NS}}}resource", f"{CIM_NS}RemoteUnitType.SubstationControlSystem")
+        type_el = SubElement(rtu, _CIM_RU_TYPE)
+        type_el.set(_RDF_RESOURCE, f"{CIM_NS}RemoteUnitType.SubstationControlSystem")
 
-        role_el = SubElement(rtu, f"{{{VER_NS}}}RemoteUnit.role")
+        role_el = SubElement(rtu, _VER_RU_ROLE)
         role_el.text = "rtu"
 
-        self._remote_units[f"__rtac__{rtu_name}"] = rtu
         self.stats["remote_units"] += 1
 
+    def _append(
+        self, section: int, tag: QName, attrib: Optional[Dict[QName, str]] = None
+    ) -> etree._Element:
+        """New top-level element at the end of ``section``."""
+        elem = SubElement(self._root, tag, attrib)
+        tails = self._section_tails
+        # Goes after this section's last element, else the nearest earlier
+        # section's; usually that is where SubElement already put it
+        for i in range(section, -1, -1):
+            if (anchor := tails[i]) is not None:
+                if elem.getprevious() is not anchor:
+                    anchor.addnext(elem)
+                break
+        else:
+            if elem.getprevious() is not None:
+                self._root.insert(0, elem)
+        tails[section] = elem
+        return elem
+
+    def _new_remote_unit(self, key: str, mrid: str) -> etree._Element:
+        """Append a RemoteUnit; one already stored under ``key`` is replaced in place."""
+        if (previous := self._remote_units.get(key)) is not None:
+            rtu = SubElement(self._root, _CIM_REMOTE_UNIT, {_RDF_ID: mrid})
+            self._root.replace(previous[0], rtu)
+            if self._section_tails[_SECTION_REMOTE_UNITS] is previous[0]:
+                self._section_tails[_SECTION_REMOTE_UNITS] = rtu
+        else:
+            rtu = self._append(_SECTION_REMOTE_UNITS, _CIM_REMOTE_UNIT, {_RDF_ID: mrid})
+        self._remote_units[key] = (rtu, mrid)
+        self._single_rtu_mrid = mrid if len(self._remote_units) == 1 else None
+        return rtu
+
     def add_points(self, points: List[Dict]) -> None:
         """
         Add RTAC points as CIM Measurement/Control instances.
@@ -241,180 +392,148 @@ class SCProfileBuilder:
         - cim:RemoteSource or cim:RemoteControl linking to RemoteUnit
         - ver:SCADAPoint extensions for RTAC-specific metadata
         """
+        has_mapping = bool(self.equipment_mapping)  # usually empty: skip the lookups
+        # Loop-invariant attributes bound once rather than looked up per point
+        substation = self.substation_name
+        stats = self.stats
+        append = self._append
         for pt in points:
-            tag_name = pt.get("name", "")
-            address = pt.get("address", "")
-            data_type = pt.get("type", "")
-            description = pt.get("description", "")
-            map_name = pt.get("map_name", "")
-            source_file = pt.get("_source_file", "")
+            get = pt.get
+            tag_name = get("name", "")
+            address = get("address", "")
+            data_type = get("type", "")
+            description = get("description", "")
+            map_name = get("map_name", "")
+            source_file = get("_source_file", "")
 
             if not tag_name:
                 continue
 
-            cim_class = _RTAC_TO_CIM_CLASS.get(data_type, "Discrete")
-            point_type = _RTAC_TO_POINT_TYPE.get(data_type, "BI")
-            is_control = data_type in _CONTROL_TYPES
+            info = _RTAC_INFO.get(data_type, _DEFAULT_INFO)
+            is_control = info.is_control
 
-            mrid = _make_mrid("pt", self.substation_name, tag_name)
+            mrid = _make_mrid("pt", substation, tag_name)
 
             # ── Build measurement/control element ──
-            if is_control:
-                elem = Element(f"{{{CIM_NS}}}Control")
-                self.stats["control_points"] += 1
-            elif cim_class == "Analog":
-                elem = Element(f"{{{CIM_NS}}}Analog")
-                self.stats["analog_points"] += 1
-            elif cim_class == "Accumulator":
-                elem = Element(f"{{{CIM_NS}}}Accumulator")
-                self.stats["accumulator_points"] += 1
-            else:
-                elem = Element(f"{{{CIM_NS}}}Discrete")
-                self.stats["discrete_points"] += 1
-
-            elem.set(f"{{{RDF_NS}}}ID", mrid)
+            elem = append(_SECTION_MEASUREMENTS, info.cim_tag, {_RDF_ID: mrid})
+            stats[info.stats_key] += 1
 
             # Standard CIM attributes
-            n = SubElement(elem, f"{{{CIM_NS}}}IdentifiedObject.name")
+            n = SubElement(elem, _CIM_IO_NAME)
             n.text = tag_name
 
-            m = SubElement(elem, f"{{{CIM_NS}}}IdentifiedObject.mRID")
+            m = SubElement(elem, _CIM_IO_MRID)
             m.text = mrid
 
             if description:
-                d = SubElement(elem, f"{{{CIM_NS}}}IdentifiedObject.description")
+                d = SubElement(elem, _CIM_IO_DESCRIPTION)
                 d.text = description
 
             if not is_control:
-                mt = SubElement(elem, f"{{{CIM_NS}}}Measurement.measurementType")
-                mt.text = point_type
+                mt = SubElement(elem, _CIM_MEAS_TYPE)
+                mt.text = info.point_type
 
             # ── Link to EQ profile equipment (if mapping exists) ──
-            eq_mrid = self._resolve_equipment_mrid(tag_name, map_name)
+            eq_mrid = (
+                self._resolve_equipment_mrid(tag_name, map_name) if has_mapping else None
+            )
             if eq_mrid:
-                if is_control:
-                    psr = SubElement(elem, f"{{{CIM_NS}}}Control.PowerSystemResource")
-                else:
-                    psr = SubElement(elem, f"{{{CIM_NS}}}Measurement.PowerSystemResource")
-                psr.set(f"{{{RDF_NS}}}resource", f"#{eq_mrid}")
+                psr = SubElement(elem, info.psr_tag)
+                psr.set(_RDF_RESOURCE, f"#{eq_mrid}")
 
             # ── Verance SCADA extensions ──
             if address:
-                addr_el = SubElement(elem, f"{{{VER_NS}}}SCADAPoint.dnp3Address")
+                addr_el = SubElement(elem, _VER_SP_DNP3_ADDRESS)
                 addr_el.text = str(address)
 
-            proto_el = SubElement(elem, f"{{{VER_NS}}}SCADAPoint.protocol")
+            proto_el = SubElement(elem, _VER_SP_PROTOCOL)
             proto_el.text = "DNP3"
 
-            dt_el = SubElement(elem, f"{{{VER_NS}}}SCADAPoint.dataType")
+            dt_el = SubElement(elem, _VER_SP_DATA_TYPE)
             dt_el.text = data_type
 
-            tn_el = SubElement(elem, f"{{{VER_NS}}}SCADAPoint.tagName")
+            tn_el = SubElement(elem, _VER_SP_TAG_NAME)
             tn_el.text = tag_name
 
             if source_file:
-                sf = SubElement(elem, f"{{{VER_NS}}}SCADAPoint.sourceFile")
+                sf = SubElement(elem, _VER_SP_SOURCE_FILE)
                 sf.text = source_file
 
-            self._measurements.append(elem)
-
             # ── RemoteSource / RemoteControl linking point → RTU ──
             rtu_mrid = self._resolve_rtu_mrid(map_name)
             if rtu_mrid:
                 if is_control:
-                    rc_mrid = _make_mrid("rc", self.substation_name, tag_name)
-                    rc = Element(f"{{{CIM_NS}}}RemoteControl")
-                    rc.set(f"{{{RDF_NS}}}ID", rc_mrid)
-                    ref = SubElement(rc, f"{{{CIM_NS}}}RemoteControl.Control")
-                    ref.set(f"{{{RDF_NS}}}resource", f"#{mrid}")
-                    rtu_ref = SubElement(rc, f"{{{CIM_NS}}}RemotePoint.RemoteUnit")
-                    rtu_ref.set(f"{{{RDF_NS}}}resource", f"#{rtu_mrid}")
-                    self._remote_controls.append(rc)
+                    rc_mrid = _make_mrid("rc", substation, tag_name)
+                    rc = append(_SECTION_REMOTE_CONTROLS, _CIM_REMOTE_CONTROL, {_RDF_ID: rc_mrid})
+                    ref = SubElement(rc, _CIM_RC_CONTROL)
+                    ref.set(_RDF_RESOURCE, f"#{mrid}")
+                    rtu_ref = SubElement(rc, _CIM_RP_REMOTE_UNIT)
+                    rtu_ref.set(_RDF_RESOURCE, f"#{rtu_mrid}")
                 else:
-                    rs_mrid = _make_mrid("rs", self.substation_name, tag_name)
-                    rs = Element(f"{{{CIM_NS}}}RemoteSource")
-                    rs.set(f"{{{RDF_NS}}}ID", rs_mrid)
-                    ref = SubElement(rs, f"{{{CIM_NS}}}RemoteSource.MeasurementValue")
-                    ref.set(f"{{{RDF_NS}}}resource", f"#{mrid}")
-                    rtu_ref = SubElement(rs, f"{{{CIM_NS}}}RemotePoint.RemoteUnit")
-                    rtu_ref.set(f"{{{RDF_NS}}}resource", f"#{rtu_mrid}")
-                    self._remote_sources.append(rs)
+                    rs_mrid = _make_mrid("rs", substation, tag_name)
+                    rs = append(_SECTION_REMOTE_SOURCES, _CIM_REMOTE_SOURCE, {_RDF_ID: rs_mrid})
+                    ref = SubElement(rs, _CIM_RS_MEAS_VALUE)
+                    ref.set(_RDF_RESOURCE, f"#{mrid}")
+                    rtu_ref = SubElement(rs, _CIM_RP_REMOTE_UNIT)
+                    rtu_ref.set(_RDF_RESOURCE, f"#{rtu_mrid}")
 
     def _resolve_equipment_mrid(self, tag_name: str, map_name: str) -> Optional[str]:
         """Try to resolve an EQ profile equipment mRID from the tag name."""
         # Direct lookup
-        if tag_name in self.equipment_mapping:
-            return self.equipment_mapping[tag_name]
+        mrid = self.equipment_mapping.get(tag_name)
         # Try map_name prefix
-        if map_name and map_name in self.equipment_mapping:
-            return self.equipment_mapping[map_name]
-        return None
+        if mrid is None and map_name:
+            mrid = self.equipment_mapping.get(map_name)
+        return mrid
 
     def _resolve_rtu_mrid(self, map_name: str) -> Optional[str]:
         """Get the RemoteUnit mRID for a given map name."""
-        if map_name and map_name in self._remote_units:
-            return self._remote_units[map_name].get(f"{{{RDF_NS}}}ID")
+        if map_name and (unit := self._remote_units.get(map_name)) is not None:
+            return unit[1]
         # If only one RTU, default to it
-        if len(self._remote_units) == 1:
-            return list(self._remote_units.values())[0].get(f"{{{RDF_NS}}}ID")
-        return None
-
-    def serialize(self) -> bytes:
-        """Serialize to CIM RDF/XML bytes."""
-        # Register namespace prefixes so ET uses rdf/cim/md/ver instead of ns0/ns1/…
-        ET.register_namespace("rdf", RDF_NS)
-        ET.register_namespace("cim", CIM_NS)
-        ET.register_namespace("md", MD_NS)
-        ET.register_namespace("ver", VER_NS)
-
-        # ── Build the RDF root ──
-        root = Element(f"{{{RDF_NS}}}RDF")
-
-        # ── FullModel header ──
-        header = SubElement(root, f"{{{MD_NS}}}FullModel")
-        header.set(f"{{{RDF_NS}}}about", self.model_urn)
-
-        ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-        st = SubElement(header, f"{{{MD_NS}}}Model.scenarioTime")
-        st.text = ts
-        cr = SubElement(header, f"{{{MD_NS}}}Model.created")
-        cr.text = ts
-        desc = SubElement(header, f"{{{MD_NS}}}Model.description")
-        desc.text = self.model_description
-        auth = SubElement(header, f"{{{MD_NS}}}Model.modelingAuthoritySet")
-        auth.text = f"http://verance.ai/SA/{self.substation_name}"
-        prof = SubElement(header, f"{{{MD_NS}}}Model.profile")
-        prof.text = PROFILE_URI
-
-        if self.eq_model_urn:
-            dep = SubElement(header, f"{{{MD_NS}}}Model.DependentOn")
-            dep.set(f"{{{RDF_NS}}}resource", self.eq_model_urn)
-        if self.pe_model_urn:
-            dep = SubElement(header, f"{{{MD_NS}}}Model.DependentOn")
-            dep.set(f"{{{RDF_NS}}}resource", self.pe_model_urn)
-
-        # ── Append all elements ──
-        for rtu in self._remote_units.values():
-            root.append(rtu)
-        for m in self._measurements:
-            root.append(m)
-        for rs in self._remote_sources:
-            root.append(rs)
-        for rc in self._remote_controls:
-            root.append(rc)
-        for cl in self._comm_links:
-            root.append(cl)
-        for df in self._dataflows:
-            root.append(df)
-
-        # Pretty-print
-        indent(root, space="  ")
-
-        xml_declaration = b'<?xml version="1.0" encoding="UTF-8"?>\n'
-        body = tostring(root, encoding="unicode", xml_declaration=False)
-
-        return xml_declaration + body.encode("utf-8")
+        return self._single_rtu_mrid
+
+    @contextmanager
+    def _document(self, timestamp: Optional[str]) -> Iterator[etree._Element]:
+        """The document root with a FullModel header stamped with ``timestamp``."""
+        root = self._root
+        header = _build_fullmodel_header(
+            root,
+            model_urn=self.model_urn,
+            timestamp=timestamp or model_timestamp(),
+            description=self.model_description,
+            substation_name=self.substation_name,
+            eq_model_urn=self.eq_model_urn,
+            pe_model_urn=self.pe_model_urn,
+        )
+        root.insert(0, header)
+        try:
+            yield root
+        finally:
+            # Removed again so the next serialize() stamps a fresh one
+            root.remove(header)
+
+    def serialize(self, timestamp: Optional[str] = None) -> bytes:
+        """
+        Serialize to CIM RDF/XML bytes.
+
+        ``timestamp`` (see ``model_timestamp()``) is written as the model's
+        scenarioTime/created; defaults to now.
+        """
+        with self._document(timestamp) as root:
+            return etree.tostring(root, encoding="UTF-8", xml_declaration=True, pretty_print=True)
+
+    def serialize_to_file(self, output: Union[str, BinaryIO], timestamp: Optional[str] = None) -> None:
+        """
+        Like ``serialize()``, but libxml2 writes the document straight to
+        ``output`` (a path or binary file) through a small buffer, so a
+        large profile is never held in memory as one bytes object as well
+        as a tree. Output is byte-identical to ``serialize()``.
+        """
+        with self._document(timestamp) as root:
+            etree.ElementTree(root).write(
+                output, encoding="UTF-8", xml_declaration=True, pretty_print=True
+            )
 
     def get_stats(self) -> Dict:
         """Return generation statistics."""
@@ -443,6 +562,7 @@ def generate_sc_profile(
     eq_model_urn: Optional[str] = None,
     pe_model_urn: Optional[str] = None,
     equipment_mapping: Optional[Dict[str, str]] = None,
+    timestamp: Optional[str] = None,
 ) -> Tuple[bytes, Dict]:
     """
     Generate SC profile XML from parsed RTAC data.
@@ -455,6 +575,8 @@ def generate_sc_profile(
         eq_model_urn: URN of the dependent EQ profile (optional)
         pe_model_urn: URN of the dependent PE profile (optional)
         equipment_mapping: Dict mapping RTAC tag names → CIM equipment mRIDs
+        timestamp: FullModel scenarioTime/created (defaults to now); pass one
+            ``model_timestamp()`` value to stamp a batch of profiles alike
 
     Returns:
         Tuple of (xml_bytes, stats_dict)
@@ -469,34 +591,37 @@ def generate_sc_profile(
         builder.set_rtu_identity(rtu_name)
     builder.add_devices(devices)
     builder.add_points(points)
-    return builder.serialize(), builder.get_stats()
+    return builder.serialize(timestamp), builder.get_stats()
 
 
 def generate_sc_profile_from_bytes(
-    xml_bytes: bytes,
+    xml_bytes: "XmlSource",
     filename: str,
     substation_name: str,
     eq_model_urn: Optional[str] = None,
     equipment_mapping: Optional[Dict[str, str]] = None,
+    timestamp: Optional[str] = None,
 ) -> Tuple[bytes, Dict]:
     """
     Parse RTAC XML bytes and generate SC profile in one step.
 
     Args:
-        xml_bytes: Raw RTAC XML content
+        xml_bytes: Raw RTAC XML content (bytes or binary file object)
         filename: Original filename
         substation_name: Substation name for the profile
         eq_model_urn: URN of dependent EQ profile
         equipment_mapping: Tag name → equipment mRID mapping
+        timestamp: FullModel scenarioTime/created (defaults to now)
 
     Returns:
         Tuple of (sc_profile_xml_bytes, stats_dict)
     """
-    from rtac_plg.parser import parse_rtac_xml_bytes
+    from rtac_plg.parser import parse_rtac_xml
 
-    devices, points = parse_rtac_xml_bytes(xml_bytes, filename=filename)
+    devices, points = parse_rtac_xml(xml_bytes, filename=filename)
     return generate_sc_profile(
         devices, points, substation_name,
         eq_model_urn=eq_model_urn,
         equipment_mapping=equipment_mapping,
+        timestamp=timestamp,
     )
@@ -0,0 +1,165 @@
+"""
+Process pool for CPU-bound RTAC XML work (parsing, SC profile generation).
+
+Parsing and (pure-Python) profile building are CPU-bound and mostly hold
+the GIL, so running them on the event loop stalls every other request on
+the worker. They run in a process pool instead, created lazily (warmed from
+the app lifespan) and shut down on exit. If a worker dies (segfault, OOM
+kill) the pool is broken for good; it is then dropped and recreated on the
+next task.
+"""
+
+import asyncio
+import io
+import logging
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from multiprocessing.reduction import DupFd
+from tempfile import SpooledTemporaryFile
+from typing import Any, Callable, TypeVar
+
+from lxml import etree
+
+from config import get_settings
+from rtac_plg.parser import XmlSource
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_xml_pool: ProcessPoolExecutor | None = None
+
+
+def get_xml_pool() -> ProcessPoolExecutor:
+    """Shared process pool (``XML_WORKERS`` processes)."""
+    global _xml_pool
+    if _xml_pool is None:
+        # spawn, not fork: the server process has live threads and sockets
+        _xml_pool = ProcessPoolExecutor(
+            max_workers=get_settings().xml_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info("XML process pool created")
+    return _xml_pool
+
+
+def _ready() -> int:
+    """No-op pool task; unpickling it imports this module (and lxml) in the worker."""
+    return os.getpid()
+
+
+def _discard_xml_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next task gets a fresh one."""
+    global _xml_pool
+    if _xml_pool is pool:
+        _xml_pool = None
+        logger.warning("XML process pool broken (a worker died); recreating it")
+    # Its workers are already gone; this only releases its queues and pipes
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def warm_xml_pool() -> None:
+    """
+    Start every pool worker now rather than on first use, so the first
+    uploads don't pay for process spawn and module imports.
+    """
+    pool = get_xml_pool()
+    loop = asyncio.get_running_loop()
+    # Workers are spawned on demand, one per task that finds none idle
+    await asyncio.gather(
+        *(loop.run_in_executor(pool, _ready) for _ in range(get_settings().xml_workers))
+    )
+
+
+def _disk_fd(source: XmlSource) -> int | None:
+    """File descriptor of an on-disk, non-empty file source, else None."""
+    if isinstance(source, (bytes, bytearray)):
+        return None
+    if isinstance(source, SpooledTemporaryFile):
+        # fileno() would force an in-memory spooled file out to disk, and
+        # there is no public way to ask whether it has rolled over; this
+        # relies on its private buffer, a BytesIO until the rollover.
+        if isinstance(getattr(source, "_file", None), io.BytesIO):
+            return None
+    try:
+        fd = source.fileno()
+    except (AttributeError, OSError):
+        return None
+    return fd if os.fstat(fd).st_size else None
+
+
+class _SharedFd:
+    """Picklable handle that hands a duplicate of ``fd`` to a pool worker."""
+
+    def __init__(self, fd: int):
+        self._dup = DupFd(fd)
+
+    def detach(self) -> int:
+        return self._dup.detach()
+
+
+def _call(fn: Callable[..., T], source: Any, *args: Any, **kwargs: Any) -> T:
+    """
+    Worker side: call ``fn``, mmapping ``source`` first if it is a passed
+    file descriptor. lxml errors carry an unpicklable error log, so they
+    are re-raised as ValueError with the same message.
+    """
+    fd = source.detach() if isinstance(source, _SharedFd) else None
+    try:
+        if fd is None:
+            return fn(source, *args, **kwargs)
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            return fn(mm, *args, **kwargs)
+    except etree.LxmlError as e:
+        raise ValueError(str(e)) from None
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+
+async def run_xml_task(fn: Callable[..., T], source: XmlSource, *args: Any, **kwargs: Any) -> T:
+    """
+    Run ``fn(source, *args, **kwargs)`` in the XML process pool.
+
+    ``fn`` must be a module-level function. File objects can't be pickled:
+    an on-disk file (e.g. a large upload that rolled over) is passed as a
+    duplicated descriptor that the worker mmaps, so the document is never
+    copied into this process; anything else is read into bytes.
+
+    A task running when a worker dies fails with ``BrokenProcessPool`` (it
+    may be the one that killed it, so it isn't retried); the pool is
+    replaced for later tasks.
+    """
+    if (fd := _disk_fd(source)) is not None:
+        source = _SharedFd(fd)
+    elif not isinstance(source, (bytes, bytearray)):
+        source = source.read()
+    loop = asyncio.get_running_loop()
+    call = partial(_call, fn, source, *args, **kwargs)
+    pool = get_xml_pool()
+    try:
+        future = loop.run_in_executor(pool, call)
+    except BrokenProcessPool:
+        # Broken by an earlier task; nothing was submitted, so use a new pool
+        _discard_xml_pool(pool)
+        pool = get_xml_pool()
+        future = loop.run_in_executor(pool, call)
+    try:
+        return await future
+    except BrokenProcessPool:
+        _discard_xml_pool(pool)
+        raise
+
+
+def shutdown_xml_pool() -> None:
+    """Stop the pool's worker processes (called on app shutdown)."""
+    global _xml_pool
+    if _xml_pool is not None:
+        # Waiting is quick once queued work is cancelled; not waiting leaves
+        # the pool to concurrent.futures' exit hook, which then hits EBADF
+        _xml_pool.shutdown(wait=True, cancel_futures=True)
+    _xml_pool = None